@@ -13,9 +13,24 @@ import secrets
 import json
 import re
 import time
+import threading
+import hashlib
+import gzip
+import zlib
+import struct
+import io
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from collections import deque, OrderedDict
+from typing import NamedTuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from functools import wraps
-from flask import Flask, render_template_string, request, redirect, url_for, jsonify, Response, session, g
+from functools import wraps, lru_cache
+from importlib.util import find_spec
+from flask import Flask, render_template, request, redirect, url_for, jsonify, Response, session, g, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_socketio import SocketIO, emit, join_room, disconnect
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -24,6 +39,8 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_wtf.csrf import CSRFProtect, generate_csrf
+import gevent
+from gevent.event import AsyncResult
 
 # Load environment variables from .env file (for local development)
 try:
@@ -32,12 +49,27 @@ try:
 except ImportError:
     pass  # dotenv not installed, using system env vars only
 
+# One pooled HTTP client shared by the OpenAI and Anthropic SDKs so every endpoint
+# reuses the same keep-alive TCP/TLS connections
+try:
+    import httpx
+    # httpx only speaks HTTP/2 when h2 is installed; probe for it without importing it
+    HTTP2_AVAILABLE = find_spec('h2') is not None
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=300),
+        timeout=httpx.Timeout(60, connect=5),
+        http2=HTTP2_AVAILABLE
+    )
+    atexit.register(http_client.close)
+except ImportError:
+    http_client = None
+
 # Claude AI for intelligent command parsing
 try:
     import anthropic
     CLAUDE_AVAILABLE = bool(os.environ.get('ANTHROPIC_API_KEY'))
     if CLAUDE_AVAILABLE:
-        claude_client = anthropic.Anthropic(api_key=os.environ.get('ANTHROPIC_API_KEY'))
+        claude_client = anthropic.Anthropic(api_key=os.environ.get('ANTHROPIC_API_KEY'), http_client=http_client)
         print(" Claude AI enabled for intelligent command parsing")
     else:
         claude_client = None
@@ -52,7 +84,7 @@ try:
     from openai import OpenAI
     OPENAI_AVAILABLE = bool(os.environ.get('OPENAI_API_KEY'))
     if OPENAI_AVAILABLE:
-        openai_client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+        openai_client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'), http_client=http_client)
         print(" OpenAI Whisper (STT) and TTS enabled")
     else:
         openai_client = None
@@ -62,11 +94,97 @@ except ImportError:
     openai_client = None
     print(" openai package not installed - cloud speech features unavailable")
 
+def prewarm_http_client():
+    """Open the TLS session to the AI providers before the first real request needs it"""
+    urls = []
+    if OPENAI_AVAILABLE:
+        urls.append('https://api.openai.com/')
+    if CLAUDE_AVAILABLE:
+        urls.append('https://api.anthropic.com/')
+    for url in urls:
+        try:
+            http_client.head(url)
+        except Exception as e:
+            print(f"[HTTP] Pre-warm of {url} failed: {e}")
+
+if http_client is not None and (OPENAI_AVAILABLE or CLAUDE_AVAILABLE):
+    threading.Thread(target=prewarm_http_client, daemon=True).start()
+
+# Redis for login-lockout, rate-limit and conversation state that should survive restarts and be
+# shared across processes (optional - set REDIS_URL to enable). redis-py uses blocking sockets and
+# the app isn't monkey-patched, so request-path calls go through run_blocking().
+REDIS_URL = os.environ.get('REDIS_URL')
+redis_client = None
+if REDIS_URL:
+    try:
+        import redis
+        redis_client = redis.Redis.from_url(REDIS_URL)
+        print(" Redis enabled for shared login/rate-limit/history state")
+    except ImportError:
+        print("[WARNING] REDIS_URL set but redis package not installed - using in-memory state")
+
+# argon2id for password hashing (optional - falls back to werkzeug PBKDF2)
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHash
+    password_hasher = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+    ARGON2_AVAILABLE = True
+except ImportError:
+    password_hasher = None
+    ARGON2_AVAILABLE = False
+    print(" argon2-cffi not installed - using PBKDF2 password hashes")
+
+# orjson for faster JSON parsing/serialization (optional - falls back to stdlib json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    json_loads = orjson.loads
+except ImportError:
+    ORJSON_AVAILABLE = False
+    json_loads = json.loads
+
 # ============================================================================
 # SETUP
 # ============================================================================
 
 app = Flask(__name__)
+
+# Request-path logging goes through a queue so the stdout write happens on a
+# background thread. Set DEBUG_LOGGING=1 to see per-command parse details.
+log_queue = queue.Queue(-1)
+logger = logging.getLogger('voicehub')
+logger.setLevel(logging.DEBUG if os.environ.get('DEBUG_LOGGING') else logging.INFO)
+logger.addHandler(QueueHandler(log_queue))
+logger.propagate = False
+log_listener = QueueListener(log_queue, logging.StreamHandler())
+log_listener.start()
+atexit.register(log_listener.stop)  # flush anything still queued on shutdown
+
+if ORJSON_AVAILABLE:
+    class ORJSONProvider(DefaultJSONProvider):
+        """jsonify()/request.get_json() backed by orjson; unknown types still go through Flask's default()"""
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, default=self.default,
+                                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = ORJSONProvider(app)
+
+    class ORJSONSocketCodec:
+        """json-module stand-in for Socket.IO packets (python-socketio passes separators=, orjson is always compact)"""
+        @staticmethod
+        def dumps(obj, **kwargs):
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+        @staticmethod
+        def loads(s, **kwargs):
+            return orjson.loads(s)
+
+    socket_json = ORJSONSocketCodec
+else:
+    socket_json = json
 app.secret_key = os.environ.get('SECRET_KEY', secrets.token_hex(32))
 
 # ============================================================================
@@ -83,15 +201,18 @@ ALLOWED_ORIGINS = [
 if os.environ.get('ALLOWED_ORIGINS'):
     ALLOWED_ORIGINS.extend(os.environ.get('ALLOWED_ORIGINS').split(','))
 
+# Resolved once - checked on every response by add_security_headers
+IS_PROD = os.environ.get('FLASK_ENV') != 'development'
+
 # Secure cookie configuration
 app.config.update(
     # Session cookies
-    SESSION_COOKIE_SECURE=os.environ.get('FLASK_ENV') != 'development',  # HTTPS only in production
+    SESSION_COOKIE_SECURE=IS_PROD,  # HTTPS only in production
     SESSION_COOKIE_HTTPONLY=True,  # Prevent JavaScript access to session cookie
     SESSION_COOKIE_SAMESITE='Lax',  # Prevent CSRF via cross-site requests
     
     # Remember me cookie
-    REMEMBER_COOKIE_SECURE=os.environ.get('FLASK_ENV') != 'development',
+    REMEMBER_COOKIE_SECURE=IS_PROD,
     REMEMBER_COOKIE_HTTPONLY=True,
     REMEMBER_COOKIE_SAMESITE='Lax',
     
@@ -108,7 +229,7 @@ limiter = Limiter(
     key_func=get_remote_address,
     app=app,
     default_limits=["200 per day", "50 per hour"],  # Default limits for all routes
-    storage_uri="memory://",  # Use memory storage (works on Render)
+    storage_uri=REDIS_URL if redis_client else "memory://",  # Shared across workers when Redis is configured
 )
 
 # SocketIO with restricted CORS origins
@@ -116,7 +237,10 @@ socketio = SocketIO(
     app, 
     cors_allowed_origins=ALLOWED_ORIGINS,  # Restricted to known origins only
     async_mode='gevent',
-    manage_session=False  # Let Flask handle sessions for security
+    manage_session=False,  # Let Flask handle sessions for security
+    json=socket_json
+    # No message_queue: python-socketio's Redis manager needs a monkey-patched socket library
+    # under gevent, and the server runs as a single process (python app.py)
 )
 
 login_manager = LoginManager(app)
@@ -131,6 +255,23 @@ ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'changeme')
 # Users file for persistent storage
 USERS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'users.json')
 
+def hash_password(password):
+    """Hash a password with argon2id when available, PBKDF2 otherwise"""
+    if ARGON2_AVAILABLE:
+        return password_hasher.hash(password)
+    return generate_password_hash(password, method='pbkdf2:sha256')
+
+def verify_password(password_hash, password):
+    """Check a password against either an argon2 or a werkzeug PBKDF2 hash"""
+    if password_hash.startswith('$argon2'):
+        if not ARGON2_AVAILABLE:
+            return False
+        try:
+            return password_hasher.verify(password_hash, password)
+        except (VerificationError, InvalidHash):
+            return False
+    return check_password_hash(password_hash, password)
+
 def load_users():
     """Load users from JSON file"""
     if os.path.exists(USERS_FILE):
@@ -140,7 +281,7 @@ def load_users():
         except:
             pass
     # Default admin user
-    return {'admin': {'password_hash': generate_password_hash(ADMIN_PASSWORD, method='pbkdf2:sha256'), 'name': 'Admin'}}
+    return {'admin': {'password_hash': hash_password(ADMIN_PASSWORD), 'name': 'Admin'}}
 
 def save_users():
     """Save users to JSON file"""
@@ -152,13 +293,37 @@ def save_users():
 
 USERS = load_users()
 
+# Hash of a random password, checked for unknown usernames so login timing
+# doesn't reveal which usernames exist
+DUMMY_PASSWORD_HASH = hash_password(secrets.token_hex(16))
+
 # Track failed login attempts for additional protection
+# Key: username, Value: deque of the last MAX_FAILED_ATTEMPTS failure times.
+# An account is locked only while all of those failures fall inside LOCKOUT_DURATION.
+# With Redis configured the same window lives in a per-user list (fail:<username>) instead.
 failed_login_attempts = {}
 MAX_FAILED_ATTEMPTS = 5
 LOCKOUT_DURATION = timedelta(minutes=15)
 
 # Store devices and their settings
 devices = {}
+# Reverse index: socket sid -> ids of devices last seen on that socket (for O(1) disconnect)
+sid_to_device = {}
+# Bumped by touch_devices() on every change to devices, so its JSON is only re-encoded when stale
+devices_version = 0
+devices_json_cache = (-1, b'')  # (version, serialized devices)
+
+def touch_devices():
+    """Mark the devices dict as changed"""
+    global devices_version
+    devices_version += 1
+
+def devices_json():
+    """Serialized devices dict, re-encoded only after a change"""
+    global devices_json_cache
+    if devices_json_cache[0] != devices_version:
+        devices_json_cache = (devices_version, app.json.dumps(devices).encode('utf-8'))
+    return devices_json_cache[1]
 # Store active listening sessions
 active_sessions = {}
 
@@ -653,26 +818,67 @@ Version: {{VERSION}}
 import os
 import sys
 import time
+import atexit
+import shutil
+import hashlib
+import random
 import subprocess
 import platform
+import threading
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+import uuid
+from functools import lru_cache
+from importlib.util import find_spec
+from pathlib import Path
+
+# websocket-client is required: the client connects over the websocket transport only
+DEPS = ['pyautogui', 'pyperclip', 'python-socketio[client]', 'websocket-client', 'requests']
+# PyPI requirement -> module name to probe, where the two differ
+DEP_MODULES = {'python-socketio': 'socketio', 'websocket-client': 'websocket', 'pillow': 'PIL'}
+# Written once the dependency check passes; the name embeds the version and the dependency
+# list so an update, or a new dependency, re-checks
+DEPS_SENTINEL = os.path.expanduser('~/.voicehub/.deps_ok_{{VERSION}}_'
+                                   + hashlib.sha256(' '.join(DEPS).encode()).hexdigest()[:8])
 
 # Install dependencies if missing
 def ensure_deps():
-    deps = ['pyautogui', 'pyperclip', 'python-socketio[client]', 'requests']
-    for dep in deps:
-        pkg_name = dep.split('[')[0].replace('-', '_')
-        try:
-            __import__(pkg_name)
-        except ImportError:
-            print(f"Installing {dep}...")
-            subprocess.check_call([sys.executable, '-m', 'pip', 'install', '-q', dep])
+    if os.path.exists(DEPS_SENTINEL):
+        return
+    # find_spec only locates the module; it doesn't run the package's (heavy) __init__
+    missing = []
+    for dep in DEPS:
+        pkg_name = dep.split('[')[0]
+        if find_spec(DEP_MODULES.get(pkg_name, pkg_name.replace('-', '_'))) is None:
+            missing.append(dep)
+    if missing:
+        # One pip run for everything: a single interpreter start-up and resolver pass
+        print(f"Installing {', '.join(missing)}...")
+        subprocess.check_call([sys.executable, '-m', 'pip', 'install', '-q',
+                               '--disable-pip-version-check', '--no-input', *missing])
+    try:
+        os.makedirs(os.path.dirname(DEPS_SENTINEL), exist_ok=True)
+        open(DEPS_SENTINEL, 'w').close()
+    except OSError:
+        pass
 
 ensure_deps()
 
-import pyautogui
-import pyperclip
-import socketio
-import requests
+# pyautogui/pyperclip are imported on first use (see type_text/press_enter) - loading the
+# platform GUI backends takes hundreds of ms and shouldn't hold up connecting to the server
+try:
+    import socketio
+    import websocket  # noqa: F401 - websocket-client, needed for transports=['websocket']
+    import requests
+except ImportError:
+    # Something was uninstalled after the sentinel was written - do the full check next launch
+    if os.path.exists(DEPS_SENTINEL):
+        os.remove(DEPS_SENTINEL)
+    print("A dependency is missing - run the client again to reinstall it")
+    raise
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # ============================================================================
 # CONFIGURATION
@@ -686,6 +892,23 @@ if SERVER_URL.startswith('http://') and 'onrender.com' in SERVER_URL:
 PLATFORM = platform.system()
 CLIENT_PATH = os.path.abspath(__file__)
 
+# Command-path logging goes through a queue: the console write (a blocking WriteConsole call
+# on Windows) happens on the listener thread, not between receiving a command and typing it
+log = logging.getLogger('voicehub')
+log.setLevel(logging.DEBUG if os.environ.get('VOICEHUB_DEBUG') else logging.INFO)
+log.propagate = False
+log_queue = queue.SimpleQueue()
+log.addHandler(QueueHandler(log_queue))
+log_listener = QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+log_listener.start()
+atexit.register(log_listener.stop)  # flush anything still queued on shutdown
+
+# One keep-alive session for version checks, update downloads and the Socket.IO handshake
+http_session = requests.Session()
+http_session.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=4,
+                                           max_retries=Retry(total=2, backoff_factor=0.3)))
+http_session.headers['User-Agent'] = f'VoiceHub/{VERSION}'
+
 # ============================================================================
 # AUTO-UPDATE
 # ============================================================================
@@ -694,14 +917,14 @@ def check_for_updates():
     """Check if a newer version is available and auto-update if so"""
     try:
         print(f"Checking for updates (current: v{VERSION})...")
-        response = requests.get(f"{SERVER_URL}/api/version", timeout=10)
+        response = http_session.get(f"{SERVER_URL}/api/version", timeout=10)
         if response.status_code == 200:
             data = response.json()
             latest_version = data.get('version', VERSION)
             
             if compare_versions(latest_version, VERSION) > 0:
                 print(f"New version available: v{latest_version}")
-                return update_client(data.get('download_url'))
+                return update_client(data.get('download_url'), data.get('sha256'))
             else:
                 print(f"You have the latest version (v{VERSION})")
                 return False
@@ -712,57 +935,59 @@ def check_for_updates():
 def compare_versions(v1, v2):
     """Compare two version strings. Returns 1 if v1 > v2, -1 if v1 < v2, 0 if equal"""
     try:
-        parts1 = [int(x) for x in v1.split('.')]
-        parts2 = [int(x) for x in v2.split('.')]
-        
-        # Pad shorter version with zeros
-        while len(parts1) < len(parts2):
-            parts1.append(0)
-        while len(parts2) < len(parts1):
-            parts2.append(0)
-        
-        for p1, p2 in zip(parts1, parts2):
-            if p1 > p2:
-                return 1
-            elif p1 < p2:
-                return -1
-        return 0
-    except:
+        parts1 = tuple(int(x) for x in v1.split('.'))
+        parts2 = tuple(int(x) for x in v2.split('.'))
+    except (AttributeError, ValueError):
         return 0
-
-def update_client(download_url):
-    """Download and install the new version"""
+    
+    # Pad the shorter version with zeros, then let tuple comparison do the rest
+    width = max(len(parts1), len(parts2))
+    parts1 += (0,) * (width - len(parts1))
+    parts2 += (0,) * (width - len(parts2))
+    return (parts1 > parts2) - (parts1 < parts2)
+
+def update_client(download_url, expected_sha256=None):
+    """Download and install the new version, refusing it if it doesn't match expected_sha256"""
+    backup_path = CLIENT_PATH + '.backup'
+    temp_path = CLIENT_PATH + '.new'
     try:
         print("Downloading update...")
-        response = requests.get(download_url, timeout=30)
-        if response.status_code == 200:
-            # Write the new version
-            new_content = response.text
-            
-            # Save to a temp file first
-            temp_path = CLIENT_PATH + '.new'
-            with open(temp_path, 'w') as f:
-                f.write(new_content)
-            
-            # Replace the old file
-            backup_path = CLIENT_PATH + '.backup'
-            if os.path.exists(backup_path):
-                os.remove(backup_path)
-            os.rename(CLIENT_PATH, backup_path)
-            os.rename(temp_path, CLIENT_PATH)
-            
-            print("Update installed! Restarting...")
-            time.sleep(1)
-            
-            # Restart the script
-            os.execv(sys.executable, [sys.executable, CLIENT_PATH])
-            return True
+        # Stream the raw bytes straight into a temp file (no str decode/encode round trip)
+        # Hash while receiving so a truncated or corrupted download is caught without a second read
+        digest = hashlib.sha256()
+        with http_session.get(download_url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            with open(temp_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    digest.update(chunk)
+                    f.write(chunk)
+        if expected_sha256 and digest.hexdigest() != expected_sha256:
+            os.remove(temp_path)
+            print("Update failed: download doesn't match the server's checksum - keeping the current version")
+            return False
+        
+        # Keep one prior copy, then swap atomically - CLIENT_PATH is never missing
+        shutil.copy2(CLIENT_PATH, backup_path)
+        os.replace(temp_path, CLIENT_PATH)
+        
+        print("Update installed! Restarting...")
+        time.sleep(1)
+        
+        # Restart the script - execv skips atexit, so flush the log queue first
+        log_listener.stop()
+        os.execv(sys.executable, [sys.executable, CLIENT_PATH])
+        return True
     except Exception as e:
         print(f"Update failed: {e}")
-        # Try to restore backup
-        if os.path.exists(backup_path):
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        # Try to restore backup if something removed the client out from under us
+        if os.path.exists(backup_path) and not os.path.exists(CLIENT_PATH):
             try:
-                os.rename(backup_path, CLIENT_PATH)
+                shutil.copy2(backup_path, CLIENT_PATH)
                 print("Restored previous version")
             except:
                 pass
@@ -828,84 +1053,246 @@ APPS = {
     }
 }
 
+# APPS resolved for this platform once: name -> (app identifier, url or None)
+APP_TARGETS = {name: (info.get(PLATFORM, name), info.get('url')) for name, info in APPS.items()}
+
+# Platform-specific keys and URL opener, picked once instead of branching per command
+if PLATFORM == 'Darwin':
+    PASTE_HOTKEY = ('command', 'v')
+    NEW_TAB_HOTKEY = ('command', 't')
+    def open_url_command(url):
+        subprocess.run(['open', url], check=True)
+elif PLATFORM == 'Windows':
+    PASTE_HOTKEY = ('ctrl', 'v')
+    NEW_TAB_HOTKEY = ('ctrl', 't')
+    def open_url_command(url):
+        # os.startfile is most reliable on Windows
+        os.startfile(url)
+else:
+    PASTE_HOTKEY = ('ctrl', 'v')
+    NEW_TAB_HOTKEY = ('ctrl', 't')
+    def open_url_command(url):
+        subprocess.run(['xdg-open', url], check=True)
+
+@lru_cache(maxsize=1)
+def mac_workspace():
+    """Shared NSWorkspace via PyObjC (installed with pyautogui on macOS), or None if unavailable"""
+    try:
+        from AppKit import NSWorkspace
+    except ImportError:
+        return None
+    return NSWorkspace.sharedWorkspace()
+
+def find_window_win32(app_id):
+    """Handle of a visible top-level window for app_id (matched on process exe, else title), or None"""
+    import ctypes
+    from ctypes import wintypes
+    user32 = ctypes.windll.user32
+    kernel32 = ctypes.windll.kernel32
+    target = app_id.lower()
+    title_hint = target[:-4] if target.endswith('.exe') else target
+    exe_match, title_match = [], []
+    
+    def check_window(hwnd, _):
+        length = user32.GetWindowTextLengthW(hwnd)
+        if not length or not user32.IsWindowVisible(hwnd):
+            return True
+        pid = wintypes.DWORD()
+        user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        process = kernel32.OpenProcess(0x1000, False, pid.value)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if process:
+            path = ctypes.create_unicode_buffer(260)
+            size = wintypes.DWORD(260)
+            found = kernel32.QueryFullProcessImageNameW(process, 0, path, ctypes.byref(size))
+            kernel32.CloseHandle(process)
+            if found and os.path.basename(path.value).lower() == target:
+                exe_match.append(hwnd)
+                return False  # exact process match - stop enumerating
+        if not title_match:
+            title = ctypes.create_unicode_buffer(length + 1)
+            user32.GetWindowTextW(hwnd, title, length + 1)
+            if title_hint in title.value.lower():
+                title_match.append(hwnd)
+        return True
+    
+    enum_proc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)(check_window)
+    user32.EnumWindows(enum_proc, 0)
+    matches = exe_match or title_match
+    return matches[0] if matches else None
+
+def focus_window_win32(app_id):
+    """Bring app_id's window to the front with Win32 calls; False if no window matched"""
+    import ctypes
+    hwnd = find_window_win32(app_id)
+    if not hwnd:
+        return False
+    user32 = ctypes.windll.user32
+    if user32.IsIconic(hwnd):
+        user32.ShowWindow(hwnd, 9)  # SW_RESTORE
+    return bool(user32.SetForegroundWindow(hwnd))
+
+FOCUS_POLL_INTERVAL = 0.02  # seconds between foreground checks after focusing an app
+FOCUS_TIMEOUT = 0.3         # give up waiting for focus confirmation after this long
+
+def foreground_name():
+    """Name/title of the app currently in the foreground (lowercase), or None if it can't be read"""
+    if PLATFORM == 'Darwin':
+        workspace = mac_workspace()
+        if not workspace:
+            return None
+        app = workspace.frontmostApplication()
+        return app.localizedName().lower() if app else ''
+    if PLATFORM == 'Windows':
+        import ctypes
+        user32 = ctypes.windll.user32
+        hwnd = user32.GetForegroundWindow()
+        length = user32.GetWindowTextLengthW(hwnd)
+        title = ctypes.create_unicode_buffer(length + 1)
+        user32.GetWindowTextW(hwnd, title, length + 1)
+        return title.value.lower()
+    try:
+        result = subprocess.run(['xdotool', 'getactivewindow', 'getwindowname'],
+                                capture_output=True, text=True, timeout=FOCUS_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip().lower() if result.returncode == 0 else None
+
+def wait_for_focus(app_id, timeout=FOCUS_TIMEOUT):
+    """Poll until app_id is in the foreground; returns as soon as it is, or after timeout"""
+    target = app_id.lower()
+    if target.endswith('.exe'):
+        target = target[:-4]
+    deadline = time.monotonic() + timeout
+    while True:
+        name = foreground_name()
+        if name is None:
+            # Can't observe the foreground on this system - fall back to a blind wait
+            time.sleep(max(0, deadline - time.monotonic()))
+            return False
+        if target in name:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(FOCUS_POLL_INTERVAL)
+
 def focus_app(app_name):
     """Bring an app to the foreground"""
     app_name = app_name.lower().strip()
-    app_info = APPS.get(app_name, {})
-    app_id = app_info.get(PLATFORM, app_name)
+    app_id, url = APP_TARGETS.get(app_name, (app_name, None))
     
     try:
         if PLATFORM == 'Darwin':
-            # macOS
-            script = f'tell application "{app_id}" to activate'
-            subprocess.run(['osascript', '-e', script], capture_output=True)
-            print(f" Focused: {app_id}")
+            # macOS - activate in-process through AppKit; osascript (a new process per call) as fallback
+            workspace = mac_workspace()
+            if not (workspace and workspace.launchApplication_(app_id)):
+                script = f'tell application "{app_id}" to activate'
+                subprocess.run(['osascript', '-e', script], capture_output=True)
+            log.info(f" Focused: {app_id}")
             
             # If it's a web app, open the URL
-            if 'url' in app_info:
+            if url:
                 time.sleep(0.5)
-                subprocess.run(['open', app_info['url']], capture_output=True)
+                subprocess.run(['open', url], capture_output=True)
                 
         elif PLATFORM == 'Windows':
-            # Windows - use PowerShell
-            if 'url' in app_info:
-                subprocess.run(['start', app_info['url']], shell=True, capture_output=True)
-            else:
-                # Try to focus the window
+            # Windows - find the window and focus it in-process (a PowerShell start-up costs ~500ms)
+            if url:
+                subprocess.run(['start', url], shell=True, capture_output=True)
+            elif not focus_window_win32(app_id):
+                # No matching window found via Win32 - fall back to PowerShell
                 subprocess.run(['powershell', '-Command', 
                     f'(New-Object -ComObject WScript.Shell).AppActivate("{app_id}")'], 
                     capture_output=True)
-            print(f" Focused: {app_id}")
+            log.info(f" Focused: {app_id}")
             
         elif PLATFORM == 'Linux':
             # Linux - use wmctrl or xdotool
-            if 'url' in app_info:
-                subprocess.run(['xdg-open', app_info['url']], capture_output=True)
+            if url:
+                subprocess.run(['xdg-open', url], capture_output=True)
             else:
                 subprocess.run(['wmctrl', '-a', app_id], capture_output=True)
-            print(f" Focused: {app_id}")
+            log.info(f" Focused: {app_id}")
             
-        time.sleep(0.3)  # Wait for app to focus
+        if url:
+            time.sleep(FOCUS_TIMEOUT)  # the browser's window title won't name the web app
+        else:
+            wait_for_focus(app_id)  # returns as soon as the window is actually in front
         return True
         
     except Exception as e:
-        print(f" Could not focus {app_name}: {e}")
+        log.warning(f" Could not focus {app_name}: {e}")
         return False
 
+TYPEWRITE_MAX_LENGTH = 80      # shorter printable ASCII is typed directly instead of pasted
+CLIPBOARD_RESTORE_DELAY = 0.5  # seconds after a paste before the previous clipboard comes back
+
+# The one pending clipboard restore: (Timer, the user's clipboard from before the first paste).
+# Back-to-back pastes share it, so the second never saves the first paste's text as "previous".
+clipboard_restore = None
+clipboard_lock = threading.Lock()
+
+def restore_clipboard():
+    """Timer callback: put the user's clipboard back, unless a newer paste took over the restore"""
+    global clipboard_restore
+    import pyperclip
+    with clipboard_lock:
+        if clipboard_restore is None or clipboard_restore[0] is not threading.current_thread():
+            return
+        pyperclip.copy(clipboard_restore[1])
+        clipboard_restore = None
+
 def type_text(text):
     """Type text using the keyboard"""
-    print(f"[DEBUG] type_text called with: '{text[:50]}...'")
+    import pyautogui
+    import pyperclip
+    log.debug(f"type_text called with: '{text[:50]}...'")
     try:
-        # Use clipboard + paste for reliability
-        print("[DEBUG] Copying to clipboard...")
-        pyperclip.copy(text)
-        print("[DEBUG] Clipboard set, waiting...")
-        time.sleep(0.1)
+        # Short plain ASCII: type it directly - no clipboard round trip, no settle delay
+        if len(text) < TYPEWRITE_MAX_LENGTH and text.isascii() and text.isprintable():
+            pyautogui.typewrite(text, interval=0)
+            log.info(f" Typed: {text[:50]}...")
+            return True
         
-        if PLATFORM == 'Darwin':
-            print("[DEBUG] Pressing Cmd+V...")
-            pyautogui.hotkey('command', 'v')
-        else:
-            print("[DEBUG] Pressing Ctrl+V...")
-            pyautogui.hotkey('ctrl', 'v')
-            
-        print(f" Typed: {text[:50]}...")
+        # Otherwise use clipboard + paste for reliability, then give the user's clipboard back.
+        # The lock keeps a pending restore from landing between our copy and the paste keystroke.
+        global clipboard_restore
+        with clipboard_lock:
+            if clipboard_restore is not None:
+                # An earlier paste's restore is still pending - its saved value is the user's
+                timer, previous_clipboard = clipboard_restore
+                timer.cancel()
+            else:
+                try:
+                    previous_clipboard = pyperclip.paste()
+                except Exception:
+                    previous_clipboard = None
+            pyperclip.copy(text)
+            time.sleep(0.05)
+            
+            pyautogui.hotkey(*PASTE_HOTKEY)
+            
+            clipboard_restore = None
+            if previous_clipboard is not None:
+                # Restore off-thread, late enough that the target app has read the pasted text
+                timer = threading.Timer(CLIPBOARD_RESTORE_DELAY, restore_clipboard)
+                clipboard_restore = (timer, previous_clipboard)
+                timer.start()
+            
+        log.info(f" Typed: {text[:50]}...")
         return True
     except Exception as e:
-        import traceback
-        print(f" Could not type: {e}")
-        print(f"[DEBUG] Full error: {traceback.format_exc()}")
+        log.exception(f" Could not type: {e}")
         return False
 
 def press_enter():
     """Press the Enter key"""
+    import pyautogui
     pyautogui.press('enter')
 
 def run_command(command, app=None):
     """Run a command in terminal/shell"""
     if app:
         focus_app(app)
-        time.sleep(0.3)
     
     type_text(command)
     time.sleep(0.1)
@@ -914,64 +1301,60 @@ def run_command(command, app=None):
 def open_url_native(url):
     """Open a URL using the system's native method - more reliable than webbrowser module"""
     try:
-        if PLATFORM == 'Darwin':
-            # macOS - use 'open' command
-            subprocess.run(['open', url], check=True)
-            print(f" Opened URL (macOS): {url}")
-        elif PLATFORM == 'Windows':
-            # Windows - use os.startfile or start command
-            # os.startfile is most reliable on Windows
-            os.startfile(url)
-            print(f" Opened URL (Windows): {url}")
-        else:
-            # Linux - use xdg-open
-            subprocess.run(['xdg-open', url], check=True)
-            print(f" Opened URL (Linux): {url}")
+        open_url_command(url)
+        log.info(f" Opened URL ({PLATFORM}): {url}")
         return True
     except Exception as e:
-        print(f" Native open failed: {e}, trying webbrowser...")
+        log.warning(f" Native open failed: {e}, trying webbrowser...")
         # Fallback to webbrowser module
         try:
             import webbrowser
             webbrowser.open(url)
-            print(f" Opened URL (webbrowser fallback): {url}")
+            log.info(f" Opened URL (webbrowser fallback): {url}")
             return True
         except Exception as e2:
-            print(f"X Could not open URL: {e2}")
+            log.error(f"X Could not open URL: {e2}")
             return False
 
 # ============================================================================
 # SOCKET.IO CLIENT
 # ============================================================================
 
+@lru_cache(maxsize=1)
+def load_device_id():
+    """Get or create a persistent device ID"""
+    id_file = Path('~/.voicehub/device_id').expanduser()
+    try:
+        device_id = id_file.read_text().strip()
+        if device_id:
+            return device_id
+    except FileNotFoundError:
+        pass
+    id_file.parent.mkdir(parents=True, exist_ok=True)
+    device_id = f"desktop_{uuid.uuid4().hex[:8]}"
+    # Write-then-rename so a crash can never leave a truncated ID behind
+    tmp_file = id_file.with_suffix('.tmp')
+    tmp_file.write_text(device_id)
+    tmp_file.replace(id_file)
+    return device_id
+
 class VoiceHubClient:
     def __init__(self):
-        self.sio = socketio.Client(reconnection=True, reconnection_attempts=0, reconnection_delay=5)
-        self.device_id = self._get_device_id()
+        # Jittered backoff so clients don't all reconnect at once after a server restart;
+        # library loggers off so there's no per-packet log formatting
+        self.sio = socketio.Client(reconnection=True, reconnection_attempts=0, reconnection_delay=5,
+                                   reconnection_delay_max=30, randomization_factor=0.5,
+                                   logger=False, engineio_logger=False, http_session=http_session)
+        self.device_id = load_device_id()
         self.device_name = platform.node() or 'Desktop Client'
         self._setup_handlers()
         
-    def _get_device_id(self):
-        """Get or create a persistent device ID"""
-        id_file = os.path.expanduser('~/.voicehub/device_id')
-        os.makedirs(os.path.dirname(id_file), exist_ok=True)
-        
-        if os.path.exists(id_file):
-            with open(id_file, 'r') as f:
-                return f.read().strip()
-        else:
-            import uuid
-            device_id = f"desktop_{uuid.uuid4().hex[:8]}"
-            with open(id_file, 'w') as f:
-                f.write(device_id)
-            return device_id
-    
     def _setup_handlers(self):
         """Set up Socket.IO event handlers"""
         
         @self.sio.event
         def connect():
-            print("Connected to Voice Hub!")
+            log.info("Connected to Voice Hub!")
             self.sio.emit('dashboard_join', {'deviceId': self.device_id})
             self.sio.emit('device_update', {
                 'deviceId': self.device_id,
@@ -984,27 +1367,24 @@ class VoiceHubClient:
                     'platform': PLATFORM
                 }
             })
-            print(f"Registered as: {self.device_name} ({self.device_id})")
+            log.info(f"Registered as: {self.device_name} ({self.device_id})")
         
         @self.sio.event
         def disconnect():
-            print("Disconnected from Voice Hub")
+            log.info("Disconnected from Voice Hub")
         
         @self.sio.event
         def connect_error(data):
-            print(f"Connection error: {data}")
+            log.warning(f"Connection error: {data}")
         
         @self.sio.on('devices_update')
         def on_devices_update(data):
             count = len(data.get('devices', {}))
-            print(f"Devices online: {count}")
+            log.info(f"Devices online: {count}")
         
         @self.sio.on('command_received')
         def on_command_received(data):
-            print(f"\\n{'='*50}")
-            print(f" COMMAND RECEIVED!")
-            print(f" DATA: {data}")
-            print(f"{'='*50}")
+            log.debug(f"Command payload: {data}")
             self._execute_command(data)
         
         @self.sio.on('update_available')
@@ -1019,9 +1399,20 @@ class VoiceHubClient:
                 # If relative URL, prepend server URL
                 if download_url and not download_url.startswith('http'):
                     download_url = SERVER_URL + download_url
-                if download_url:
-                    print(f"Downloading update from {download_url}...")
-                    update_client(download_url)
+                
+                def install():
+                    if download_url and data.get('sha256'):
+                        print(f"Downloading update from {download_url}...")
+                        update_client(download_url, data['sha256'])
+                    else:
+                        # No checksum in the notification - get it (and the URL) from /api/version
+                        check_for_updates()
+                
+                # The server notifies every client at once; spread the downloads over its window
+                delay = random.uniform(0, data.get('spread') or 0)
+                if delay:
+                    print(f"Installing in {delay:.0f}s...")
+                threading.Timer(delay, install).start()
             else:
                 print("Already up to date!")
     
@@ -1032,42 +1423,41 @@ class VoiceHubClient:
         target_app = data.get('targetApp')
         from_device = data.get('fromDeviceId', 'unknown')
         
-        print(f"\nCommand from {from_device}:")
-        print(f"  Action: {action}")
-        print(f"  Target: {target_app or 'current app'}")
-        print(f"  Text: {command[:50]}{'...' if len(command) > 50 else ''}")
+        # One record per command rather than four console writes
+        log.info(f"\nCommand from {from_device}:\n"
+                 f"  Action: {action}\n"
+                 f"  Target: {target_app or 'current app'}\n"
+                 f"  Text: {command[:50]}{'...' if len(command) > 50 else ''}")
         
         # Focus target app if specified
         if target_app:
             focus_app(target_app)
-            time.sleep(0.5)
         
         # Execute the action
-        print(f"[DEBUG] Executing action: '{action}'")
+        log.debug(f"Executing action: '{action}'")
         if action == 'type' or action == 'paste':
             type_text(command)
-            print("Typed text")
+            log.info("Typed text")
         elif action == 'type_and_send':
-            print("[DEBUG] type_and_send branch matched!")
             result = type_text(command)
-            print(f"[DEBUG] type_text returned: {result}")
+            log.debug(f"type_text returned: {result}")
             time.sleep(0.2)
             press_enter()
-            print("Typed and sent!")
+            log.info("Typed and sent!")
         elif action == 'open':
             focus_app(target_app or command)
-            print(f"Opened {target_app or command}")
+            log.info(f"Opened {target_app or command}")
         elif action == 'open_tab':
             # Open a new browser tab
             if command:
                 open_url_native(command)
-                print(f"Opened new tab: {command}")
+                log.info(f"Opened new tab: {command}")
             else:
                 # Just open a new tab in default browser
+                import pyautogui
                 focus_app('chrome')
-                time.sleep(0.3)
-                pyautogui.hotkey('command' if PLATFORM == 'Darwin' else 'ctrl', 't')
-                print("Opened new tab")
+                pyautogui.hotkey(*NEW_TAB_HOTKEY)
+                log.info("Opened new tab")
         elif action == 'open_url':
             # Open a specific URL
             url = command if command else 'https://google.com'
@@ -1075,19 +1465,19 @@ class VoiceHubClient:
             if not url.startswith('http'):
                 url = 'https://' + url
             open_url_native(url)
-            print(f"Opened URL: {url}")
+            log.info(f"Opened URL: {url}")
         elif action == 'run':
             run_command(command, target_app or 'terminal')
-            print("Command executed")
+            log.info("Command executed")
         elif action == 'search':
             # Search in browser
             search_url = f"https://www.google.com/search?q={command.replace(' ', '+')}"
             open_url_native(search_url)
-            print(f"Searching: {command}")
+            log.info(f"Searching: {command}")
         else:
             # Default: just type
             type_text(command)
-            print("Typed")
+            log.info("Typed")
     
     def run(self):
         """Run the client"""
@@ -1111,7 +1501,8 @@ class VoiceHubClient:
         
         try:
             print(f"Connecting to {SERVER_URL}...")
-            self.sio.connect(SERVER_URL, transports=['websocket', 'polling'])
+            # Straight to websocket (the server runs gevent-websocket) - no long-polling handshake first
+            self.sio.connect(SERVER_URL, transports=['websocket'], wait_timeout=10)
             self.sio.wait()
         except KeyboardInterrupt:
             print("\nGoodbye!")
@@ -1170,26 +1561,16 @@ LOGIN_PAGE = '''
             color: var(--text);
             overflow: hidden;
         }
+        /* Static gradients stand in for the old blurred, animated orbs - no per-frame filter work */
         .bg-effects {
             position: fixed;
             inset: 0;
             pointer-events: none;
             z-index: 0;
-        }
-        .orb {
-            position: absolute;
-            border-radius: 50%;
-            filter: blur(80px);
-            opacity: 0.15;
-            animation: float 20s ease-in-out infinite;
-        }
-        .orb-1 { width: 400px; height: 400px; background: #333333; top: -100px; left: -100px; }
-        .orb-2 { width: 300px; height: 300px; background: #222222; bottom: -50px; right: -50px; animation-delay: -10s; }
-        .orb-3 { width: 200px; height: 200px; background: #444444; top: 50%; left: 50%; animation-delay: -5s; }
-        @keyframes float {
-            0%, 100% { transform: translate(0, 0) scale(1); }
-            33% { transform: translate(30px, -30px) scale(1.1); }
-            66% { transform: translate(-20px, 20px) scale(0.9); }
+            background:
+                radial-gradient(circle 280px at 100px 100px, rgba(51, 51, 51, 0.15), transparent),
+                radial-gradient(circle 230px at calc(100% - 100px) calc(100% - 100px), rgba(34, 34, 34, 0.15), transparent),
+                radial-gradient(circle 180px at calc(50% + 100px) calc(50% + 100px), rgba(68, 68, 68, 0.15), transparent);
         }
         .container {
             position: relative;
@@ -1199,8 +1580,7 @@ LOGIN_PAGE = '''
             padding: 20px;
         }
         .card {
-            background: rgba(26, 26, 36, 0.8);
-            backdrop-filter: blur(20px);
+            background: rgba(26, 26, 36, 0.92);
             border: 1px solid var(--border);
             border-radius: 24px;
             padding: 48px 40px;
@@ -1308,11 +1688,7 @@ LOGIN_PAGE = '''
     </style>
 </head>
 <body>
-    <div class="bg-effects">
-        <div class="orb orb-1"></div>
-        <div class="orb orb-2"></div>
-        <div class="orb orb-3"></div>
-    </div>
+    <div class="bg-effects"></div>
     <div class="container">
         <div class="card">
             <div class="logo">
@@ -1505,8 +1881,9 @@ DASHBOARD_PAGE = '''
     <link href="https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;500;600;700&family=JetBrains+Mono:wght@400;500&display=swap" rel="stylesheet">
     <script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.5.4/socket.io.min.js"></script>
     <!-- Picovoice for local wake word + speech-to-text (FREE & FAST) -->
-    <script src="https://unpkg.com/@picovoice/porcupine-web@2.1.6/dist/iife/index.js"></script>
-    <script src="https://unpkg.com/@picovoice/cheetah-web@3.0.0/dist/iife/index.js"></script>
+    <!-- Deferred: only touched on demand (initCheetah checks the global), so don't block first paint -->
+    <script defer src="https://unpkg.com/@picovoice/porcupine-web@2.1.6/dist/iife/index.js"></script>
+    <script defer src="https://unpkg.com/@picovoice/cheetah-web@3.0.0/dist/iife/index.js"></script>
     <style>
         :root {
             --bg-primary: #000000;
@@ -2731,7 +3108,7 @@ DASHBOARD_PAGE = '''
                 <!-- Quick Wake Word Toggle -->
                 <div style="display: flex; align-items: center; justify-content: center; gap: 10px; margin-top: 12px;">
                     <span style="font-size: 12px; color: var(--text-muted);">Wake Word</span>
-                    <div class="toggle" id="toggle-always-listen-quick" onclick="toggleAlwaysListen()" style="transform: scale(0.85);"></div>
+                    <div class="toggle" id="toggle-always-listen-quick" data-toggle="alwaysListen" style="transform: scale(0.85);"></div>
                 </div>
                 
                 <div class="voice-hint" id="voice-hint">
@@ -2846,7 +3223,7 @@ DASHBOARD_PAGE = '''
                         <h4>Always Listen for Wake Word</h4>
                         <p>Keep microphone on to detect wake word anytime</p>
                     </div>
-                    <div class="toggle" id="toggle-always-listen" onclick="toggleAlwaysListen()"></div>
+                    <div class="toggle" id="toggle-always-listen" data-toggle="alwaysListen"></div>
                 </div>
                 <div class="setting-row">
                     <div class="setting-label">
@@ -2875,7 +3252,7 @@ DASHBOARD_PAGE = '''
                         <h4>Continuous Dictation</h4>
                         <p>Keep dictating after each phrase (no wake word needed)</p>
                     </div>
-                    <div class="toggle" id="toggle-continuous" onclick="toggleContinuous()"></div>
+                    <div class="toggle" id="toggle-continuous" data-toggle="continuous"></div>
                 </div>
                 <div class="setting-row">
                     <div class="setting-label">
@@ -2894,14 +3271,14 @@ DASHBOARD_PAGE = '''
                         <h4>Auto-Type</h4>
                         <p>Automatically copy recognized text to clipboard</p>
                     </div>
-                    <div class="toggle active" id="toggle-autotype" onclick="toggleAutoType()"></div>
+                    <div class="toggle active" id="toggle-autotype" data-toggle="autoType"></div>
                 </div>
                 <div class="setting-row">
                     <div class="setting-label">
                         <h4>Spell Check</h4>
                         <p>Auto-correct common misspellings and grammar</p>
                     </div>
-                    <div class="toggle active" id="toggle-spellcheck" onclick="toggleSpellCheck()"></div>
+                    <div class="toggle active" id="toggle-spellcheck" data-toggle="spellCheck"></div>
                 </div>
             </div>
             
@@ -3541,7 +3918,7 @@ DASHBOARD_PAGE = '''
         
         // Transcript history
         let transcriptHistory = [];
-        const sessionStartTime = new Date();
+        const sessionStartTime = Date.now();
         
         // Session & context tracking for adaptive AI
         const sessionId = 'session_' + Date.now() + '_' + Math.random().toString(36).substr(2, 9);
@@ -3649,6 +4026,23 @@ DASHBOARD_PAGE = '''
             5: 'Exact'
         };
         
+        // Settings toggle elements, looked up once
+        const toggleEls = {
+            alwaysListen: document.getElementById('toggle-always-listen'),
+            alwaysListenQuick: document.getElementById('toggle-always-listen-quick'),
+            continuous: document.getElementById('toggle-continuous'),
+            autoType: document.getElementById('toggle-autotype'),
+            spellCheck: document.getElementById('toggle-spellcheck')
+        };
+        
+        // Add-device modal and sensitivity controls, looked up once
+        const addDeviceModalEl = document.getElementById('add-device-modal');
+        const newDeviceNameEl = document.getElementById('new-device-name');
+        const newDeviceWakeEl = document.getElementById('new-device-wake');
+        const newDeviceIconEl = document.getElementById('new-device-icon');
+        const sensitivitySliderEl = document.getElementById('sensitivity-slider');
+        const sensitivityLabelEl = document.getElementById('sensitivity-label');
+        
         // Check browser support
         const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
         let micPermission = 'prompt'; // 'granted', 'denied', or 'prompt'
@@ -4311,7 +4705,19 @@ DASHBOARD_PAGE = '''
         // Put in devices list
         devices[deviceId] = currentDevice;
         
+        // Pending localStorage write - bursts of setting changes coalesce into one save
+        let saveDevicesTimer = null;
+        
         function saveDevices() {
+            if (saveDevicesTimer) return;
+            saveDevicesTimer = setTimeout(flushDevices, 200);
+        }
+        
+        function flushDevices() {
+            if (saveDevicesTimer) {
+                clearTimeout(saveDevicesTimer);
+                saveDevicesTimer = null;
+            }
             // Save ALL device settings including name, wakeWord, icon
             localStorage.setItem('voicehub_prefs', JSON.stringify({
                 name: currentDevice.name,
@@ -4336,7 +4742,10 @@ DASHBOARD_PAGE = '''
         
         // Save immediately to ensure prefs are persisted
         // (This also writes back any existing prefs to ensure they're not lost)
-        saveDevices();
+        flushDevices();
+        
+        // Don't lose a pending throttled save when the page closes
+        window.addEventListener('beforeunload', flushDevices);
         
         alwaysListen = currentDevice.alwaysListen || false;
         sensitivity = currentDevice.sensitivity || 3;
@@ -4691,6 +5100,18 @@ DASHBOARD_PAGE = '''
         }
         
         // Render available devices for routing
+        const AVAIL_ROW_TPL = document.createElement('template');
+        AVAIL_ROW_TPL.innerHTML = `
+            <div class="route-item" style="display: flex; align-items: center; gap: 10px; padding: 10px 14px; background: var(--bg-secondary); border-radius: 10px; font-size: 14px;">
+                <span class="route-icon" style="font-size: 20px;"></span>
+                <div style="flex: 1;">
+                    <div class="route-name" style="font-weight: 500;"></div>
+                    <div class="route-wake" style="font-size: 12px; color: var(--text-muted);"></div>
+                </div>
+            </div>`;
+        const THIS_DEVICE_BADGE_TPL = document.createElement('template');
+        THIS_DEVICE_BADGE_TPL.innerHTML = '<span style="font-size: 10px; background: var(--accent); color: var(--bg-primary); padding: 2px 8px; border-radius: 50px;">THIS DEVICE</span>';
+        
         function renderAvailableDevices() {
             const container = document.getElementById('available-devices');
             if (!container) return; // Element may not exist
@@ -4702,16 +5123,20 @@ DASHBOARD_PAGE = '''
                 return;
             }
             
-            container.innerHTML = deviceList.map(d => `
-                <div class="route-item" style="display: flex; align-items: center; gap: 10px; padding: 10px 14px; background: var(--bg-secondary); border-radius: 10px; font-size: 14px; ${d.id === deviceId ? 'border: 1px solid var(--accent);' : ''}">
-                    <span style="font-size: 20px;">${d.icon || ''}</span>
-                    <div style="flex: 1;">
-                        <div style="font-weight: 500;">${d.name || 'Unnamed'}</div>
-                        <div style="font-size: 12px; color: var(--text-muted);">"${d.wakeWord || 'hey computer'}"</div>
-                    </div>
-                    ${d.id === deviceId ? '<span style="font-size: 10px; background: var(--accent); color: var(--bg-primary); padding: 2px 8px; border-radius: 50px;">THIS DEVICE</span>' : ''}
-                </div>
-            `).join('');
+            // Build off-DOM and swap in once - a single reflow however many devices there are
+            const frag = document.createDocumentFragment();
+            for (const d of deviceList) {
+                const row = AVAIL_ROW_TPL.content.firstElementChild.cloneNode(true);
+                row.querySelector('.route-icon').textContent = d.icon || '';
+                row.querySelector('.route-name').textContent = d.name || 'Unnamed';
+                row.querySelector('.route-wake').textContent = '"' + (d.wakeWord || 'hey computer') + '"';
+                if (d.id === deviceId) {
+                    row.style.border = '1px solid var(--accent)';
+                    row.appendChild(THIS_DEVICE_BADGE_TPL.content.firstElementChild.cloneNode(true));
+                }
+                frag.appendChild(row);
+            }
+            container.replaceChildren(frag);
         }
         
         // ============================================================
@@ -5226,8 +5651,8 @@ DASHBOARD_PAGE = '''
                     addActivity('X Microphone access denied. Click mic button to grant permission.', 'warning');
                     alwaysListen = false;
                     isRestarting = false;
-                    document.getElementById('toggle-always-listen').classList.remove('active');
-                    document.getElementById('toggle-always-listen-quick')?.classList.remove('active');
+                    toggleEls.alwaysListen.classList.remove('active');
+                    toggleEls.alwaysListenQuick?.classList.remove('active');
                     updateUI();
                 } else if (event.error === 'audio-capture') {
                     addActivity('X No microphone detected. Check System Preferences > Security > Microphone.', 'warning');
@@ -7970,6 +8395,39 @@ DASHBOARD_PAGE = '''
                 .catch(() => { claudeAvailable = false; });
         }, 1000);
         
+        // Read a streamed parse: speak on the early 'speak' event, resolve with the final 'result'
+        async function readParseStream(response) {
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buf = '';
+            let earlySpeak = null;
+            let result = null;
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buf += decoder.decode(value, { stream: true });
+                let sep;
+                while ((sep = buf.indexOf('\\n\\n')) >= 0) {
+                    const block = buf.slice(0, sep);
+                    buf = buf.slice(sep + 2);
+                    const eventMatch = block.match(/^event: (.*)$/m);
+                    const dataMatch = block.match(/^data: (.*)$/m);
+                    if (!eventMatch || !dataMatch) continue;
+                    const payload = JSON.parse(dataMatch[1]);
+                    if (eventMatch[1] === 'speak') {
+                        earlySpeak = payload.speak;
+                        speakText(earlySpeak);
+                    } else if (eventMatch[1] === 'result') {
+                        result = payload;
+                    }
+                }
+            }
+            if (!result) throw new Error('Parse stream ended without a result');
+            // handleTranscript skips speaking what we've already started saying
+            if (earlySpeak && result.speak === earlySpeak) result.spokenEarly = true;
+            return result;
+        }
+        
         async function parseWithClaude(text) {
             try {
                 // Extract assistant name from wake word (e.g., "Hey Jarvis" > "Jarvis")
@@ -7983,7 +8441,8 @@ DASHBOARD_PAGE = '''
                     currentApp: lastTargetApp || 'unknown',
                     lastAction: lastAction ? lastAction.action + " to " + (lastAction.app || "local") + ": " + lastAction.content : "none",
                     activity: isActiveDictation ? 'active_dictation' : (continuousMode ? 'continuous' : 'general'),
-                    assistantName: assistantName.charAt(0).toUpperCase() + assistantName.slice(1).toLowerCase()
+                    assistantName: assistantName.charAt(0).toUpperCase() + assistantName.slice(1).toLowerCase(),
+                    stream: true  // Server streams the model output so we can start speaking early
                 };
                 
                 console.log(' SENDING TO AI:', JSON.stringify(contextData, null, 2));
@@ -7995,7 +8454,9 @@ DASHBOARD_PAGE = '''
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify(contextData)
                 });
-                const data = await response.json();
+                // Fast-path and cached answers come back as plain JSON, model answers as a stream
+                const isStream = (response.headers.get('Content-Type') || '').includes('text/event-stream');
+                const data = isStream ? await readParseStream(response) : await response.json();
                 console.log(' AI RESPONSE:', JSON.stringify(data, null, 2));
                 
                 // Claude ALWAYS returns a valid response now (no fallback)
@@ -8091,7 +8552,7 @@ DASHBOARD_PAGE = '''
                         // Generate a helpful clarifying question
                         const clarifyMessage = claudeResult.speak || "I didn't quite catch that. Could you rephrase or tell me what you'd like me to do?";
                         addChatMessage(clarifyMessage, 'jarvis');
-                        speakText(clarifyMessage);
+                        if (!claudeResult.spokenEarly) speakText(clarifyMessage);
                         addActivity('Asking for clarification', 'info');
                         
                         // Auto-activate mic to listen for the answer
@@ -8104,7 +8565,7 @@ DASHBOARD_PAGE = '''
                     // Claude has a response to speak
                     if (claudeResult.speak && !claudeResult.needsClarification) {
                         addChatMessage(claudeResult.speak, 'jarvis');
-                        speakText(claudeResult.speak);
+                        if (!claudeResult.spokenEarly) speakText(claudeResult.speak);
                         aiResponseShown = true;
                         
                         // If AI asked a question, auto-activate mic for the answer
@@ -8746,7 +9207,7 @@ DASHBOARD_PAGE = '''
             const langSelect = document.getElementById('language-select');
             const sensitivitySlider = document.getElementById('sensitivity-slider');
             const sensitivityLabel = document.getElementById('sensitivity-label');
-            const alwaysListenToggle = document.getElementById('toggle-always-listen');
+            const alwaysListenToggle = toggleEls.alwaysListen;
             const badgeAlways = document.getElementById('badge-always');
             const badgeContinuous = document.getElementById('badge-continuous');
             
@@ -8787,6 +9248,71 @@ DASHBOARD_PAGE = '''
             return days + 'd ago';
         }
         
+        // Row skeletons for the device list - cloned per device, then filled via textContent
+        const THIS_DEVICE_ROW_TPL = document.createElement('template');
+        THIS_DEVICE_ROW_TPL.innerHTML = `
+            <div class="device-item" style="cursor: pointer; padding: 12px; background: rgba(0,245,212,0.15); border-radius: 10px; border: 2px solid var(--accent); margin-bottom: 8px; transition: transform 0.1s;">
+                <div style="display: flex; justify-content: space-between; align-items: center;">
+                    <div style="display: flex; align-items: center; gap: 8px;">
+                        <span class="device-icon" style="font-size: 20px;"></span>
+                        <strong class="device-name"></strong>
+                    </div>
+                    <span style="font-size: 9px; background: var(--success); color: white; padding: 2px 8px; border-radius: 10px;">THIS DEVICE</span>
+                </div>
+                <div class="device-wake" style="font-size: 12px; color: var(--accent); margin-top: 6px; font-family: monospace;"></div>
+                <div style="font-size: 10px; color: var(--text-muted); margin-top: 4px;">Click to edit</div>
+            </div>`;
+        const OTHER_DEVICE_ROW_TPL = document.createElement('template');
+        OTHER_DEVICE_ROW_TPL.innerHTML = `
+            <div class="device-item" style="cursor: pointer; padding: 10px; background: var(--bg-secondary); border-radius: 8px; margin-bottom: 6px; transition: transform 0.1s;">
+                <div style="display: flex; justify-content: space-between; align-items: center;">
+                    <div style="display: flex; align-items: center; gap: 8px;">
+                        <span class="device-icon" style="font-size: 18px;"></span>
+                        <span class="device-name"></span>
+                    </div>
+                    <span class="device-status" style="font-size: 8px; color: white; padding: 2px 6px; border-radius: 8px;"></span>
+                </div>
+                <div class="device-wake" style="font-size: 11px; color: var(--text-muted); margin-top: 4px; font-family: monospace;"></div>
+            </div>`;
+        
+        // Keyed rows currently in the device list (id -> element), updated in place on re-render
+        const deviceRowEls = new Map();
+        let noOtherDevicesEl = null;
+        
+        function setTextIfChanged(el, text) {
+            if (el.textContent !== text) el.textContent = text;
+        }
+        
+        function buildDeviceRow(d) {
+            const tpl = d.id === deviceId ? THIS_DEVICE_ROW_TPL : OTHER_DEVICE_ROW_TPL;
+            const row = tpl.content.firstElementChild.cloneNode(true);
+            const id = d.id;
+            row.addEventListener('click', () => openDeviceEditor(id));
+            return row;
+        }
+        
+        function updateDeviceRow(row, d) {
+            setTextIfChanged(row.querySelector('.device-icon'), d.icon || '');
+            
+            if (d.id === deviceId) {
+                setTextIfChanged(row.querySelector('.device-name'), d.name || 'This Device');
+                setTextIfChanged(row.querySelector('.device-wake'), 'Wake: "' + (d.wakeWord || 'computer') + '"');
+                return;
+            }
+            
+            const isOnline = d.online !== false;
+            const lastSeenText = d.lastSeen ? formatLastSeen(d.lastSeen) : '';
+            const statusText = isOnline ? (lastSeenText ? 'Active ' + lastSeenText : 'ONLINE') : 'OFFLINE';
+            
+            setTextIfChanged(row.querySelector('.device-name'), d.name || 'Unknown');
+            setTextIfChanged(row.querySelector('.device-wake'), 'Wake: "' + (d.wakeWord || 'unknown') + '"');
+            const statusEl = row.querySelector('.device-status');
+            setTextIfChanged(statusEl, statusText);
+            statusEl.style.background = isOnline ? 'var(--success)' : 'var(--text-muted)';
+            row.style.opacity = isOnline ? 1 : 0.5;
+            row.classList.toggle('online', isOnline);
+        }
+        
         function renderDeviceList() {
             const listEl = document.getElementById('device-list');
             if (!listEl) return;
@@ -8795,58 +9321,63 @@ DASHBOARD_PAGE = '''
             const allDevices = Object.values(devices);
             const thisDevice = allDevices.find(d => d.id === deviceId);
             const otherDevices = allDevices.filter(d => d.id !== deviceId && d.type !== 'desktop_client');
-            
-            let html = '';
-            
-            // This device first (highlighted)
-            if (thisDevice) {
-                html += `
-                    <div class="device-item" onclick="openDeviceEditor('${thisDevice.id}')" style="cursor: pointer; padding: 12px; background: rgba(0,245,212,0.15); border-radius: 10px; border: 2px solid var(--accent); margin-bottom: 8px; transition: transform 0.1s;">
-                        <div style="display: flex; justify-content: space-between; align-items: center;">
-                            <div style="display: flex; align-items: center; gap: 8px;">
-                                <span style="font-size: 20px;">${thisDevice.icon || ''}</span>
-                                <strong>${thisDevice.name || 'This Device'}</strong>
-                            </div>
-                            <span style="font-size: 9px; background: var(--success); color: white; padding: 2px 8px; border-radius: 10px;">THIS DEVICE</span>
-                        </div>
-                        <div style="font-size: 12px; color: var(--accent); margin-top: 6px; font-family: monospace;">
-                            Wake: "${thisDevice.wakeWord || 'computer'}"
-                        </div>
-                        <div style="font-size: 10px; color: var(--text-muted); margin-top: 4px;">Click to edit</div>
-                    </div>
-                `;
-            }
-            
-            // Other connected devices
-            otherDevices.forEach(d => {
-                const isOnline = d.online !== false;
-                const lastSeenText = d.lastSeen ? formatLastSeen(d.lastSeen) : '';
-                const statusText = isOnline ? (lastSeenText ? 'Active ' + lastSeenText : 'ONLINE') : 'OFFLINE';
+            const ordered = thisDevice ? [thisDevice, ...otherDevices] : otherDevices;
+            
+            // First paint: build every row off-DOM and swap them in with one reflow
+            if (deviceRowEls.size === 0) {
+                const frag = document.createDocumentFragment();
+                for (const d of ordered) {
+                    const row = buildDeviceRow(d);
+                    row.dataset.deviceId = d.id;
+                    deviceRowEls.set(d.id, row);
+                    updateDeviceRow(row, d);
+                    frag.appendChild(row);
+                }
+                listEl.replaceChildren(frag);
+            } else {
+                // Drop rows for devices that are gone, plus anything we didn't render (placeholder markup)
+                const wanted = new Set(ordered.map(d => d.id));
+                for (const [id, row] of deviceRowEls) {
+                    if (!wanted.has(id)) {
+                        row.remove();
+                        deviceRowEls.delete(id);
+                    }
+                }
+                for (const child of Array.from(listEl.childNodes)) {
+                    if (child !== noOtherDevicesEl && !(child.dataset && deviceRowEls.has(child.dataset.deviceId))) {
+                        child.remove();
+                    }
+                }
                 
-                html += `
-                    <div class="device-item" onclick="openDeviceEditor('${d.id}')" style="cursor: pointer; padding: 10px; background: var(--bg-secondary); border-radius: 8px; margin-bottom: 6px; opacity: ${isOnline ? 1 : 0.5}; transition: transform 0.1s;">
-                        <div style="display: flex; justify-content: space-between; align-items: center;">
-                            <div style="display: flex; align-items: center; gap: 8px;">
-                                <span style="font-size: 18px;">${d.icon || ''}</span>
-                                <span>${d.name || 'Unknown'}</span>
-                            </div>
-                            <span style="font-size: 8px; background: ${isOnline ? 'var(--success)' : 'var(--text-muted)'}; color: white; padding: 2px 6px; border-radius: 8px;">
-                                ${statusText}
-                            </span>
-                        </div>
-                        <div style="font-size: 11px; color: var(--text-muted); margin-top: 4px; font-family: monospace;">
-                            Wake: "${d.wakeWord || 'unknown'}"
-                        </div>
-                    </div>
-                `;
-            });
+                // Update existing rows in place, create missing ones, and fix ordering
+                ordered.forEach((d, i) => {
+                    let row = deviceRowEls.get(d.id);
+                    if (!row) {
+                        row = buildDeviceRow(d);
+                        row.dataset.deviceId = d.id;
+                        deviceRowEls.set(d.id, row);
+                    }
+                    updateDeviceRow(row, d);
+                    if (listEl.children[i] !== row) {
+                        listEl.insertBefore(row, listEl.children[i] || null);
+                    }
+                });
+            }
             
             // If no other devices
-            if (otherDevices.length === 0 && thisDevice) {
-                html += `<div style="color: var(--text-muted); font-size: 12px; padding: 8px; text-align: center;">No other devices connected</div>`;
+            const showEmpty = otherDevices.length === 0 && !!thisDevice;
+            if (showEmpty && !noOtherDevicesEl) {
+                noOtherDevicesEl = document.createElement('div');
+                noOtherDevicesEl.style.cssText = 'color: var(--text-muted); font-size: 12px; padding: 8px; text-align: center;';
+                noOtherDevicesEl.textContent = 'No other devices connected';
+            }
+            if (noOtherDevicesEl) {
+                if (showEmpty) {
+                    if (listEl.lastChild !== noOtherDevicesEl) listEl.appendChild(noOtherDevicesEl);
+                } else {
+                    noOtherDevicesEl.remove();
+                }
             }
-            
-            listEl.innerHTML = html;
         }
         
         // Update lastSeen display every 30 seconds
@@ -9019,12 +9550,24 @@ DASHBOARD_PAGE = '''
         }
         
         function addActivity(message, type = 'info', words = 0) {
-            const time = new Date().toLocaleTimeString();
-            activityLog.unshift({ message, type, time, words });
+            // Store a raw timestamp - the display string is built lazily at render time
+            activityLog.unshift({ message, type, ts: Date.now(), words });
             activityLog = activityLog.slice(0, 50); // Keep last 50
             renderActivityLog();
         }
         
+        // toLocaleTimeString() goes through Intl, so reuse the last result within the same second
+        let lastTimeKey = -1;
+        let lastTimeStr = '';
+        function formatTimeOfDay(ts) {
+            const key = Math.floor(ts / 1000);
+            if (key !== lastTimeKey) {
+                lastTimeKey = key;
+                lastTimeStr = new Date(ts).toLocaleTimeString();
+            }
+            return lastTimeStr;
+        }
+        
         function renderActivityLog() {
             const listEl = document.getElementById('activity-list');
             
@@ -9041,15 +9584,19 @@ DASHBOARD_PAGE = '''
             
             const icons = { success: '', info: '[i]', warning: '' };
             
-            listEl.innerHTML = activityLog.map(a => `
+            listEl.innerHTML = activityLog.map(a => {
+                // Each entry is formatted once, then reused on later re-renders
+                const time = a.time || (a.time = formatTimeOfDay(a.ts));
+                return `
                 <div class="activity-item">
                     <div class="activity-icon ${a.type}">${icons[a.type] || '[i]'}</div>
                     <div class="activity-content">
                         <p>${a.message}</p>
-                        <span class="time">${a.time}${a.words ? ` * ${a.words} words` : ''}</span>
+                        <span class="time">${time}${a.words ? ` * ${a.words} words` : ''}</span>
                     </div>
                 </div>
-            `).join('');
+            `;
+            }).join('');
         }
         
         // ============================================================
@@ -9061,7 +9608,7 @@ DASHBOARD_PAGE = '''
                 id: Date.now(),
                 text: text,
                 type: type, // 'command', 'wake', 'routed'
-                time: new Date(),
+                ts: Date.now(),  // formatted only when the history modal renders
                 device: currentDevice?.name || 'Unknown'
             };
             transcriptHistory.push(entry);
@@ -9091,8 +9638,9 @@ DASHBOARD_PAGE = '''
             const listEl = document.getElementById('transcript-history-list');
             const infoEl = document.getElementById('transcript-session-info');
             
-            // Update session info
-            const elapsed = Math.floor((new Date() - sessionStartTime) / 1000 / 60);
+            // Update session info (one clock read for the whole render)
+            const now = Date.now();
+            const elapsed = Math.floor((now - sessionStartTime) / 60000);
             if (elapsed < 1) {
                 infoEl.textContent = 'Session started just now';
             } else if (elapsed < 60) {
@@ -9124,20 +9672,26 @@ DASHBOARD_PAGE = '''
             };
             
             listEl.innerHTML = transcriptHistory.slice().reverse().map(function(entry) {
-                const timeStr = entry.time.toLocaleTimeString();
+                const timeStr = formatTimeOfDay(entry.ts);
                 var icon = typeIcons[entry.type] || '';
                 var label = typeLabels[entry.type] || 'Transcript';
+                var color = entry.type === 'wake' ? 'var(--accent)' : entry.type === 'routed' ? '#a855f7' : 'var(--border)';
                 
-                return '<div style="background: var(--bg-secondary); border-radius: 12px; padding: 14px 16px; border-left: 3px solid ' + (entry.type === 'wake' ? 'var(--accent)' : entry.type === 'routed' ? '#a855f7' : 'var(--border)') + ';">' +
-                    '<div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 6px;">' +
-                        '<span style="font-size: 12px; color: var(--text-muted);">' + icon + ' ' + label + '</span>' +
-                        '<span style="font-size: 11px; color: var(--text-muted);">' + timeStr + '</span>' +
-                    '</div>' +
-                    '<p style="font-size: 15px; line-height: 1.5; margin: 0; word-break: break-word;">' + escapeHtml(entry.text) + '</p>' +
-                '</div>';
+                return TX_CHUNKS[0] + color + TX_CHUNKS[1] + icon + TX_CHUNKS[2] + label +
+                    TX_CHUNKS[3] + timeStr + TX_CHUNKS[4] + escapeHtml(entry.text) + TX_CHUNKS[5];
             }).join('');
         }
         
+        // Static markup for one transcript row - values are interleaved between these chunks
+        const TX_CHUNKS = [
+            '<div style="background: var(--bg-secondary); border-radius: 12px; padding: 14px 16px; border-left: 3px solid ',
+            ';"><div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 6px;"><span style="font-size: 12px; color: var(--text-muted);">',
+            ' ',
+            '</span><span style="font-size: 11px; color: var(--text-muted);">',
+            '</span></div><p style="font-size: 15px; line-height: 1.5; margin: 0; word-break: break-word;">',
+            '</p></div>'
+        ];
+        
         function clearTranscriptHistory() {
             transcriptHistory = [];
             updateTranscriptCount();
@@ -9193,11 +9747,11 @@ DASHBOARD_PAGE = '''
                 }
                 
                 // Update all toggle states (including quick toggle)
-                document.getElementById('toggle-always-listen').classList.toggle('active', alwaysListen);
-                document.getElementById('toggle-always-listen-quick')?.classList.toggle('active', alwaysListen);
-                document.getElementById('toggle-continuous').classList.toggle('active', continuousMode);
-                document.getElementById('toggle-autotype').classList.toggle('active', autoType);
-                document.getElementById('toggle-spellcheck').classList.toggle('active', spellCheckEnabled);
+                toggleEls.alwaysListen.classList.toggle('active', alwaysListen);
+                toggleEls.alwaysListenQuick?.classList.toggle('active', alwaysListen);
+                toggleEls.continuous.classList.toggle('active', continuousMode);
+                toggleEls.autoType.classList.toggle('active', autoType);
+                toggleEls.spellCheck.classList.toggle('active', spellCheckEnabled);
                 
                 // Load keybind setting
                 loadKeybindSetting();
@@ -9232,8 +9786,8 @@ DASHBOARD_PAGE = '''
             renderDeviceList();
             addActivity('Updated ' + setting + ' to "' + value + '"', 'info');
             
-            // Sync to server
-            socketEmit('device_update', { deviceId: currentDevice.id, settings: currentDevice });
+            // Sync only the changed setting - the server merges partial updates
+            socketEmit('device_update', { deviceId: currentDevice.id, settings: { [setting]: value } });
         }
         
         // Track if mic was manually clicked (bypasses wake word requirement)
@@ -9254,8 +9808,8 @@ DASHBOARD_PAGE = '''
             
             alwaysListen = !alwaysListen;
             console.log('alwaysListen now:', alwaysListen);
-            document.getElementById('toggle-always-listen').classList.toggle('active', alwaysListen);
-            document.getElementById('toggle-always-listen-quick')?.classList.toggle('active', alwaysListen);
+            toggleEls.alwaysListen.classList.toggle('active', alwaysListen);
+            toggleEls.alwaysListenQuick?.classList.toggle('active', alwaysListen);
             currentDevice.alwaysListen = alwaysListen;
             saveDevices();
             
@@ -9295,7 +9849,7 @@ DASHBOARD_PAGE = '''
             }
             
             continuousMode = !continuousMode;
-            document.getElementById('toggle-continuous').classList.toggle('active', continuousMode);
+            toggleEls.continuous.classList.toggle('active', continuousMode);
             currentDevice.continuous = continuousMode;
             saveDevices();
             
@@ -9308,7 +9862,7 @@ DASHBOARD_PAGE = '''
         
         function toggleAutoType() {
             autoType = !autoType;
-            document.getElementById('toggle-autotype').classList.toggle('active', autoType);
+            toggleEls.autoType.classList.toggle('active', autoType);
             currentDevice.autoType = autoType;
             saveDevices();
             addActivity(autoType ? 'Auto-type enabled' : 'Auto-type disabled', 'info');
@@ -9318,18 +9872,31 @@ DASHBOARD_PAGE = '''
             sensitivity = parseInt(value);
             currentDevice.sensitivity = sensitivity;
             saveDevices();
-            document.getElementById('sensitivity-label').textContent = sensitivityLabels[sensitivity];
+            sensitivityLabelEl.textContent = sensitivityLabels[sensitivity];
             addActivity("Wake word sensitivity set to: " + sensitivityLabels[sensitivity], 'info');
         }
         
         function toggleSpellCheck() {
             spellCheckEnabled = !spellCheckEnabled;
-            document.getElementById('toggle-spellcheck').classList.toggle('active', spellCheckEnabled);
+            toggleEls.spellCheck.classList.toggle('active', spellCheckEnabled);
             currentDevice.spellCheck = spellCheckEnabled;
             saveDevices();
             addActivity(spellCheckEnabled ? ' Spell check enabled' : 'Spell check disabled', 'info');
         }
         
+        // Settings toggles carry data-toggle=NAME - one delegated listener dispatches them all
+        const TOGGLE_HANDLERS = {
+            alwaysListen: toggleAlwaysListen,
+            continuous: toggleContinuous,
+            autoType: toggleAutoType,
+            spellCheck: toggleSpellCheck
+        };
+        
+        document.addEventListener('click', (e) => {
+            const btn = e.target.closest('[data-toggle]');
+            if (btn) TOGGLE_HANDLERS[btn.dataset.toggle]?.();
+        });
+        
         // ============================================================
         // KEYBIND SETTINGS
         // ============================================================
@@ -9429,20 +9996,20 @@ DASHBOARD_PAGE = '''
         // ============================================================
         
         function openAddDeviceModal() {
-            document.getElementById('add-device-modal').classList.add('active');
-            document.getElementById('new-device-name').focus();
+            addDeviceModalEl.classList.add('active');
+            newDeviceNameEl.focus();
         }
         
         function closeAddDeviceModal() {
-            document.getElementById('add-device-modal').classList.remove('active');
-            document.getElementById('new-device-name').value = '';
-            document.getElementById('new-device-wake').value = '';
+            addDeviceModalEl.classList.remove('active');
+            newDeviceNameEl.value = '';
+            newDeviceWakeEl.value = '';
         }
         
         function addDevice() {
-            const name = document.getElementById('new-device-name').value.trim();
-            const wakeWord = document.getElementById('new-device-wake').value.trim().toLowerCase();
-            const icon = document.getElementById('new-device-icon').value;
+            const name = newDeviceNameEl.value.trim();
+            const wakeWord = newDeviceWakeEl.value.trim().toLowerCase();
+            const icon = newDeviceIconEl.value;
             
             if (!name) {
                 alert('Please enter a device name');
@@ -9474,6 +10041,50 @@ DASHBOARD_PAGE = '''
         // SOCKET EVENTS (only in browser, not Electron)
         // ============================================================
         
+        // Debug log for hot socket handlers: kept in a 256-entry ring buffer instead of the console.
+        // Zero cost unless window.__DEBUG is set; call dumpLog() in devtools to inspect.
+        const LOG_RING = new Array(256);
+        let LOG_I = 0;
+        function dlog(...args) {
+            if (!window.__DEBUG) return;
+            LOG_RING[LOG_I++ & 255] = args;
+        }
+        window.dumpLog = () => console.table(LOG_RING.filter(Boolean));
+        
+        // Device events arrive in bursts - mark lists dirty and re-render at most once per frame
+        let deviceListDirty = false;
+        let availDirty = false;
+        let rafHandle = 0;
+        let needsRenderOnShow = false;
+        
+        function scheduleRender() {
+            // Background tab - keep the state current but skip DOM work until it's visible again
+            if (document.hidden) {
+                needsRenderOnShow = true;
+                return;
+            }
+            if (rafHandle) return;
+            rafHandle = requestAnimationFrame(() => {
+                rafHandle = 0;
+                if (deviceListDirty) {
+                    deviceListDirty = false;
+                    renderDeviceList();
+                }
+                if (availDirty) {
+                    availDirty = false;
+                    renderAvailableDevices();
+                }
+            });
+        }
+        
+        document.addEventListener('visibilitychange', () => {
+            if (!document.hidden && needsRenderOnShow) {
+                needsRenderOnShow = false;
+                deviceListDirty = availDirty = true;
+                scheduleRender();
+            }
+        });
+        
         if (socket) {
         socket.on('connect', () => {
             console.log('Connected to server');
@@ -9495,48 +10106,83 @@ DASHBOARD_PAGE = '''
             }, 30000);
         });
         
+        function mergeRemoteDevice(id, device) {
+            // Update or add the device
+            devices[id] = { ...devices[id], ...device };
+            
+            // If this is OUR device and settings were changed remotely, update currentDevice and save
+            if (id === deviceId) {
+                var wasChanged = false;
+                if (device.name && device.name !== currentDevice.name) {
+                    currentDevice.name = device.name;
+                    wasChanged = true;
+                }
+                if (device.wakeWord && device.wakeWord !== currentDevice.wakeWord) {
+                    currentDevice.wakeWord = device.wakeWord;
+                    wasChanged = true;
+                }
+                if (device.icon && device.icon !== currentDevice.icon) {
+                    currentDevice.icon = device.icon;
+                    wasChanged = true;
+                }
+                if (wasChanged) {
+                    console.log('Device settings updated remotely:', currentDevice.name, currentDevice.wakeWord);
+                    saveDevices();
+                    updateUI();
+                }
+            }
+        }
+        
+        function renderRemoteDevices() {
+            renderDeviceList();
+            renderAvailableDevices();
+            
+            // Debug: log connected desktop clients
+            const desktopClients = Object.values(devices).filter(d => d.type === 'desktop_client');
+            if (desktopClients.length > 0) {
+                dlog('Desktop clients available:', desktopClients.map(d => d.name));
+            }
+        }
+        
+        // Full device list - sent once when we join
         socket.on('devices_update', (data) => {
             if (data.devices) {
                 for (const [id, device] of Object.entries(data.devices)) {
-                    // Update or add the device
-                    devices[id] = { ...devices[id], ...device };
-                    
-                    // If this is OUR device and settings were changed remotely, update currentDevice and save
-                    if (id === deviceId) {
-                        var wasChanged = false;
-                        if (device.name && device.name !== currentDevice.name) {
-                            currentDevice.name = device.name;
-                            wasChanged = true;
-                        }
-                        if (device.wakeWord && device.wakeWord !== currentDevice.wakeWord) {
-                            currentDevice.wakeWord = device.wakeWord;
-                            wasChanged = true;
-                        }
-                        if (device.icon && device.icon !== currentDevice.icon) {
-                            currentDevice.icon = device.icon;
-                            wasChanged = true;
-                        }
-                        if (wasChanged) {
-                            console.log('Device settings updated remotely:', currentDevice.name, currentDevice.wakeWord);
-                            saveDevices();
-                            updateUI();
+                    mergeRemoteDevice(id, device);
+                }
+                renderRemoteDevices();
+            }
+        });
+        
+        // Incremental changes after the initial sync: [{op: 'upsert'|'delete', deviceId, device}],
+        // plus batched heartbeats as {op: 'seen', seen: [[deviceId, epochSeconds], ...]}
+        socket.on('device_patch', (patches) => {
+            for (const patch of patches) {
+                if (patch.op === 'seen') {
+                    // lastSeen only shows in the device list
+                    for (const [id, ts] of patch.seen) {
+                        if (devices[id]) {
+                            devices[id].lastSeen = new Date(ts * 1000).toISOString();
+                            devices[id].online = true;
                         }
                     }
+                    deviceListDirty = true;
+                    continue;
                 }
-                renderDeviceList();
-                renderAvailableDevices();
-                
-                // Debug: log connected desktop clients
-                const desktopClients = Object.values(devices).filter(d => d.type === 'desktop_client');
-                if (desktopClients.length > 0) {
-                    console.log('Desktop clients available:', desktopClients.map(d => d.name));
+                if (patch.op === 'delete') {
+                    if (patch.deviceId !== deviceId) delete devices[patch.deviceId];
+                } else if (patch.device) {
+                    mergeRemoteDevice(patch.deviceId, patch.device);
                 }
+                deviceListDirty = availDirty = true;
             }
+            // Coalesce with other device events - at most one render per frame, none while hidden
+            scheduleRender();
         });
         
         // Handle incoming routed commands from other devices
         socket.on('command_received', (data) => {
-            console.log('Received routed command:', data);
+            dlog('Received routed command:', data);
             handleRoutedCommand(data);
         });
         
@@ -9549,25 +10195,33 @@ DASHBOARD_PAGE = '''
             } else if (devices[id]) {
                 devices[id].online = true;
             }
-            renderDeviceList();
-            renderAvailableDevices();
-            console.log('Device online:', data.device?.name || id);
+            deviceListDirty = availDirty = true;
+            scheduleRender();
+            dlog('Device online:', data.device?.name || id);
+        });
+        
+        // Server lost this device (restart) - resend the full record
+        socket.on('device_resync', (data) => {
+            const device = devices[data.deviceId];
+            if (device) {
+                socketEmit('device_add', { ...device, id: data.deviceId });
+            }
         });
         
         socket.on('device_offline', (data) => {
             if (devices[data.deviceId]) {
                 devices[data.deviceId].online = false;
                 devices[data.deviceId].lastSeen = new Date().toISOString();
-                renderDeviceList();
-                renderAvailableDevices();
+                deviceListDirty = availDirty = true;
+                scheduleRender();
             }
         });
         
-        socket.on('device_heartbeat', (data) => {
-            if (devices[data.deviceId]) {
-                devices[data.deviceId].lastSeen = data.lastSeen;
-                devices[data.deviceId].online = true;
-                renderDeviceList();
+        socket.on('disconnect', () => {
+            // Drop any queued frame - the next connect re-syncs the full list
+            if (rafHandle) {
+                cancelAnimationFrame(rafHandle);
+                rafHandle = 0;
             }
         });
         } // End if(socket)
@@ -9576,13 +10230,18 @@ DASHBOARD_PAGE = '''
         // INITIALIZATION
         // ============================================================
         
-        // Initial render
+        // Initial render - only what's needed for first paint runs synchronously
         updateUI();
         renderDeviceList();
-        renderActivityLog();
-        renderAvailableDevices();
         loadExtensions();  // Load extension states
         
+        // Activity log and routing list aren't critical - render them when the browser is idle
+        const whenIdle = window.requestIdleCallback || ((cb) => setTimeout(cb, 1));
+        whenIdle(() => {
+            renderActivityLog();
+            renderAvailableDevices();
+        }, { timeout: 200 });
+        
         // Restore settings
         alwaysListen = currentDevice?.alwaysListen || false;
         continuousMode = currentDevice?.continuous || false;
@@ -9590,35 +10249,47 @@ DASHBOARD_PAGE = '''
         spellCheckEnabled = currentDevice?.spellCheck ?? true;
         sensitivity = currentDevice?.sensitivity || 3;
         
-        document.getElementById('toggle-always-listen').classList.toggle('active', alwaysListen);
-        document.getElementById('toggle-always-listen-quick')?.classList.toggle('active', alwaysListen);
-        document.getElementById('toggle-continuous').classList.toggle('active', continuousMode);
-        document.getElementById('toggle-autotype').classList.toggle('active', autoType);
-        document.getElementById('toggle-spellcheck').classList.toggle('active', spellCheckEnabled);
-        document.getElementById('sensitivity-slider').value = sensitivity;
-        document.getElementById('sensitivity-label').textContent = sensitivityLabels[sensitivity];
-        
-        // Close modal on escape
-        document.addEventListener('keydown', (e) => {
-            if (e.key === 'Escape') closeAddDeviceModal();
-        });
+        // Read all restored settings first, then write every toggle in a single frame
+        function applyInitialSettings() {
+            const state = { alwaysListen, continuousMode, autoType, spellCheckEnabled, sensitivity };
+            requestAnimationFrame(() => {
+                toggleEls.alwaysListen.classList.toggle('active', state.alwaysListen);
+                toggleEls.alwaysListenQuick?.classList.toggle('active', state.alwaysListen);
+                toggleEls.continuous.classList.toggle('active', state.continuousMode);
+                toggleEls.autoType.classList.toggle('active', state.autoType);
+                toggleEls.spellCheck.classList.toggle('active', state.spellCheckEnabled);
+                sensitivitySliderEl.value = state.sensitivity;
+                sensitivityLabelEl.textContent = sensitivityLabels[state.sensitivity];
+            });
+        }
+        applyInitialSettings();
         
         // Press Space to stop recording (when actively recording)
-        document.addEventListener('keydown', (e) => {
+        function stopRecordingOnSpace(e) {
             // Only trigger if Space is pressed without modifiers and we're recording
-            if (e.code === 'Space' && !e.shiftKey && !e.ctrlKey && !e.metaKey && !e.altKey) {
-                // Check if we're actively recording (not just in wake word standby)
-                if (isActiveDictation || (isListening && !alwaysListen)) {
-                    e.preventDefault();
-                    console.log('[KEYBOARD] Space pressed - stopping recording');
-                    stopWhisperRecording();
-                }
+            if (e.shiftKey || e.ctrlKey || e.metaKey || e.altKey) return;
+            // Check if we're actively recording (not just in wake word standby)
+            if (isActiveDictation || (isListening && !alwaysListen)) {
+                e.preventDefault();
+                console.log('[KEYBOARD] Space pressed - stopping recording');
+                stopWhisperRecording();
             }
+        }
+        
+        // Page-level keybindings - one listener, one lookup per keypress.
+        // Not passive: the Space binding has to preventDefault.
+        const KEYMAP = {
+            Escape: closeAddDeviceModal,  // Close modal on escape
+            Space: stopRecordingOnSpace
+        };
+        document.addEventListener('keydown', (e) => {
+            const fn = KEYMAP[e.code];
+            if (fn) fn(e);
         });
         
         // Close modal on overlay click
-        document.getElementById('add-device-modal').addEventListener('click', (e) => {
-            if (e.target.id === 'add-device-modal') closeAddDeviceModal();
+        addDeviceModalEl.addEventListener('click', (e) => {
+            if (e.target === addDeviceModalEl) closeAddDeviceModal();
         });
         
         // Auto-start listening if always-listen or continuous mode is enabled
@@ -9658,71 +10329,114 @@ DASHBOARD_PAGE = '''
 # SECURITY MIDDLEWARE & HELPERS
 # ============================================================================
 
+# Security headers are identical for every response, so build them once
+# Content Security Policy - allow inline scripts/styles for our embedded templates
+# but restrict external sources
+CSP_POLICY = (
+    "default-src 'self'; "
+    "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdnjs.cloudflare.com https://unpkg.com blob:; "
+    "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; "
+    "font-src 'self' https://fonts.gstatic.com; "
+    "img-src 'self' data: blob:; "
+    "media-src 'self' blob:; "
+    "connect-src 'self' wss: ws: https://cdnjs.cloudflare.com https://unpkg.com; "
+    "worker-src 'self' blob: https://unpkg.com; "
+    "frame-ancestors 'self';"
+)
+
+STATIC_HEADERS = {
+    'X-Frame-Options': 'SAMEORIGIN',                             # Prevent clickjacking
+    'X-Content-Type-Options': 'nosniff',                         # Prevent MIME type sniffing
+    'X-XSS-Protection': '1; mode=block',                         # Enable XSS filter in browsers
+    'Referrer-Policy': 'strict-origin-when-cross-origin',        # Don't leak URLs to external sites
+    'Permissions-Policy': 'geolocation=(), camera=(), payment=()',  # Disable unnecessary browser features
+    'Content-Security-Policy': CSP_POLICY,
+}
+
 @app.after_request
 def add_security_headers(response):
     """Add security headers to all responses"""
-    # Prevent clickjacking
-    response.headers['X-Frame-Options'] = 'SAMEORIGIN'
-    
-    # Prevent MIME type sniffing
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    
-    # Enable XSS filter in browsers
-    response.headers['X-XSS-Protection'] = '1; mode=block'
-    
-    # Referrer policy - don't leak URLs to external sites
-    response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-    
-    # Permissions policy - disable unnecessary browser features
-    response.headers['Permissions-Policy'] = 'geolocation=(), camera=(), payment=()'
-    
-    # Content Security Policy - allow inline scripts/styles for our embedded templates
-    # but restrict external sources
-    csp = (
-        "default-src 'self'; "
-        "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdnjs.cloudflare.com https://unpkg.com blob:; "
-        "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; "
-        "font-src 'self' https://fonts.gstatic.com; "
-        "img-src 'self' data: blob:; "
-        "media-src 'self' blob:; "
-        "connect-src 'self' wss: ws: https://cdnjs.cloudflare.com https://unpkg.com; "
-        "worker-src 'self' blob: https://unpkg.com; "
-        "frame-ancestors 'self';"
-    )
-    response.headers['Content-Security-Policy'] = csp
+    response.headers.update(STATIC_HEADERS)
     
     # HSTS - enforce HTTPS (only in production)
-    if os.environ.get('FLASK_ENV') != 'development':
+    if IS_PROD:
         response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
     
     return response
 
+# Text responses are gzipped for clients that accept it. Responses that carry a CSRF token
+# are left alone so the secret never shares a compressed body with request-influenced text (BREACH).
+GZIP_MIN_SIZE = 512
+GZIP_MIMETYPES = frozenset({'text/html', 'text/plain', 'text/css', 'application/json',
+                            'application/javascript', 'image/svg+xml'})
+
+@app.after_request
+def compress_response(response):
+    """gzip eligible text responses"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in GZIP_MIMETYPES
+            or not accepts_gzip()
+            or 'csrf_token' in g):
+        return response
+    body = response.get_data()
+    if len(body) < GZIP_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    # Like nginx: the encoded body is a different byte sequence, so only a weak validator still holds
+    etag, _ = response.get_etag()
+    if etag:
+        response.set_etag(etag, weak=True)
+    return response
+
+def get_failed_logins(username):
+    """Get recent failed login times for a username, oldest first"""
+    if redis_client:
+        return [datetime.fromtimestamp(float(t))
+                for t in run_blocking(redis_client.lrange, f'fail:{username}', 0, -1)]
+    return failed_login_attempts.get(username, ())
+
+def count_recent_failures(username):
+    """Failed logins for a username within the last LOCKOUT_DURATION"""
+    cutoff = datetime.now() - LOCKOUT_DURATION
+    return sum(1 for t in get_failed_logins(username) if t > cutoff)
+
 def is_account_locked(username):
     """Check if account is locked due to failed attempts"""
-    if username not in failed_login_attempts:
+    attempts = get_failed_logins(username)
+    if not attempts:
         return False
     
-    attempts, lockout_time = failed_login_attempts[username]
-    if attempts >= MAX_FAILED_ATTEMPTS:
-        if datetime.now() < lockout_time:
-            return True
-        else:
-            # Lockout expired, reset
-            del failed_login_attempts[username]
-            return False
-    return False
+    now = datetime.now()
+    if now - attempts[-1] >= LOCKOUT_DURATION:
+        # Every recorded failure has aged out, reset
+        clear_failed_logins(username)
+        return False
+    # Locked only if MAX_FAILED_ATTEMPTS failures happened within the window
+    return len(attempts) == MAX_FAILED_ATTEMPTS and now - attempts[0] < LOCKOUT_DURATION
 
 def record_failed_login(username):
     """Record a failed login attempt"""
+    if redis_client:
+        # Append + trim + expire in one round-trip
+        key = f'fail:{username}'
+        pipe = redis_client.pipeline()
+        pipe.rpush(key, time.time())
+        pipe.ltrim(key, -MAX_FAILED_ATTEMPTS, -1)
+        pipe.expire(key, int(LOCKOUT_DURATION.total_seconds()))
+        run_blocking(pipe.execute)
+        return
     if username not in failed_login_attempts:
-        failed_login_attempts[username] = (1, datetime.now() + LOCKOUT_DURATION)
-    else:
-        attempts, _ = failed_login_attempts[username]
-        failed_login_attempts[username] = (attempts + 1, datetime.now() + LOCKOUT_DURATION)
+        failed_login_attempts[username] = deque(maxlen=MAX_FAILED_ATTEMPTS)
+    failed_login_attempts[username].append(datetime.now())
 
 def clear_failed_logins(username):
     """Clear failed login attempts after successful login"""
-    if username in failed_login_attempts:
+    if redis_client:
+        run_blocking(redis_client.delete, f'fail:{username}')
+    elif username in failed_login_attempts:
         del failed_login_attempts[username]
 
 def sanitize_input(text, max_length=10000):
@@ -9731,10 +10445,106 @@ def sanitize_input(text, max_length=10000):
         return text
     # Limit length
     text = str(text)[:max_length]
-    # Remove null bytes
-    text = text.replace('\x00', '')
+    # Remove null bytes (the membership scan skips the copy in the common case)
+    if '\x00' in text:
+        text = text.replace('\x00', '')
     return text
 
+# ============================================================================
+# TEMPLATE MINIFICATION
+# ============================================================================
+
+# <pre>/<code>/<textarea> keep their whitespace; <script> is left as-is (line comments need their newlines)
+HTML_PRESERVE_RE = re.compile(r'(<(pre|code|textarea|script)\b.*?</\2>)', re.S | re.I)
+HTML_STYLE_RE = re.compile(r'(<style\b[^>]*>)(.*?)(</style>)', re.S | re.I)
+HTML_COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.S)
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+CSS_PUNCT_RE = re.compile(r'\s*([{};,>])\s*')
+WHITESPACE_RE = re.compile(r'\s+')
+
+def minify_css(css):
+    """Drop comments and the whitespace around CSS punctuation"""
+    css = WHITESPACE_RE.sub(' ', CSS_COMMENT_RE.sub('', css))
+    return CSS_PUNCT_RE.sub(r'\1', css).replace(';}', '}').strip()
+
+def minify_html(html):
+    """Collapse indentation in a page template once at import (a single space renders the same)"""
+    parts = HTML_PRESERVE_RE.split(html)
+    out = []
+    # split() yields text, whole preserved block, tag name, text, ...
+    for i in range(0, len(parts), 3):
+        text = HTML_COMMENT_RE.sub('', parts[i])
+        text = HTML_STYLE_RE.sub(lambda m: m.group(1) + minify_css(m.group(2)) + m.group(3), text)
+        out.append(WHITESPACE_RE.sub(' ', text))
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return ''.join(out).strip()
+
+# Page templates are compiled once here; render_template() accepts the compiled
+# Template and still applies context processors (csrf_token, current_user, ...)
+LOGIN_TEMPLATE = app.jinja_env.from_string(minify_html(LOGIN_PAGE))
+SIGNUP_TEMPLATE = app.jinja_env.from_string(SIGNUP_PAGE)
+DASHBOARD_TEMPLATE = app.jinja_env.from_string(DASHBOARD_PAGE)
+INSTALL_TEMPLATE = app.jinja_env.from_string(minify_html(INSTALL_PAGE))
+
+# Login pages are pre-rendered around a placeholder; only the session's CSRF token
+# is spliced in per request, so the login GET and failed logins skip Jinja entirely.
+# The gzip variant is precompressed too: the static halves are deflated once at import
+# and the token goes in between as a *stored* (uncompressed) block, so the secret never
+# shares a compression window with anything (no BREACH) and nothing is compressed per request.
+CSRF_PLACEHOLDER = '__csrf_token__'
+GZIP_HEADER = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x02\xff'  # deflate, no mtime, max compression, OS unknown
+
+class TokenPage(NamedTuple):
+    head: bytes
+    tail: bytes
+    gz_head: bytes   # gzip header + head deflated, ending on a full flush
+    gz_tail: bytes   # tail deflated with a fresh dictionary, final block
+    head_crc: int
+
+def token_page(html):
+    """Split a rendered page at CSRF_PLACEHOLDER and precompress both halves"""
+    head, tail = (part.encode('utf-8') for part in html.split(CSRF_PLACEHOLDER, 1))
+    head_deflate = zlib.compressobj(9, zlib.DEFLATED, -15)
+    tail_deflate = zlib.compressobj(9, zlib.DEFLATED, -15)
+    return TokenPage(head, tail,
+                     GZIP_HEADER + head_deflate.compress(head) + head_deflate.flush(zlib.Z_FULL_FLUSH),
+                     tail_deflate.compress(tail) + tail_deflate.flush(),
+                     zlib.crc32(head))
+
+def token_page_response(page):
+    """Serve a TokenPage with this session's CSRF token, gzipped if the client accepts it"""
+    token = generate_csrf().encode('utf-8')
+    if not accepts_gzip():
+        return Response(page.head + token + page.tail, mimetype='text/html')
+    stored = zlib.compressobj(0, zlib.DEFLATED, -15)
+    crc = zlib.crc32(page.tail, zlib.crc32(token, page.head_crc))
+    size = len(page.head) + len(token) + len(page.tail)
+    response = Response(page.gz_head + stored.compress(token) + stored.flush(zlib.Z_FULL_FLUSH)
+                        + page.gz_tail + struct.pack('<II', crc, size & 0xFFFFFFFF),
+                        mimetype='text/html')
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def render_token_page(template, **context):
+    """Render a page template with a placeholder where the CSRF token goes"""
+    return token_page(template.render(csrf_token=lambda: CSRF_PLACEHOLDER, **context))
+
+LOGIN_PAGE_CACHE = render_token_page(LOGIN_TEMPLATE, error=None, success=None)
+LOGIN_ERROR_MESSAGES = (
+    'Invalid username or password',
+    'Account temporarily locked. Try again in 15 minutes.',
+) + tuple(f'Invalid credentials. {n} attempts remaining.' for n in range(3))
+LOGIN_ERROR_CACHE = {
+    msg: render_token_page(LOGIN_TEMPLATE, error=msg, success=None)
+    for msg in LOGIN_ERROR_MESSAGES
+}
+
+def login_error(msg):
+    """Serve a pre-rendered login error page carrying this session's CSRF token"""
+    return token_page_response(LOGIN_ERROR_CACHE[msg])
+
 # CSRF exemptions are now applied as decorators directly on the routes
 # This ensures they work correctly (the old approach called csrf.exempt before routes were defined)
 
@@ -9750,7 +10560,7 @@ api_limit = limiter.limit("30 per minute")
 @login_required
 def dashboard():
     picovoice_key = os.environ.get('PICOVOICE_ACCESS_KEY', '')
-    return render_template_string(DASHBOARD_PAGE, user=current_user, picovoice_key=picovoice_key)
+    return render_template(DASHBOARD_TEMPLATE, user=current_user, picovoice_key=picovoice_key)
 
 @app.route('/login', methods=['GET', 'POST'])
 @login_limit
@@ -9759,17 +10569,33 @@ def login():
         return redirect(url_for('dashboard'))
     
     if request.method == 'POST':
-        u = request.form.get('username', '').strip().lower()
-        u = sanitize_input(u, max_length=100)  # Sanitize username
+        # Strip, cap and lowercase in one pass; NULs can't pass the isalnum check below anyway
+        u = (request.form.get('username') or '').strip()[:100].lower()
         p = request.form.get('password', '')
         remember = request.form.get('remember') == 'on'
         
-        # Check if account is locked
+        # Fast-fail on input that could never match an account, before any hashing. Not recorded:
+        # there's no account to lock, and arbitrary junk names would grow failed_login_attempts
+        if not p or len(u) < 3 or not u.replace('_', '').isalnum():
+            return login_error('Invalid username or password')
+        
+        # Check if account is locked (before the expensive hash check)
         if is_account_locked(u):
-            return render_template_string(LOGIN_PAGE, error='Account temporarily locked. Try again in 15 minutes.', success=None)
+            return login_error('Account temporarily locked. Try again in 15 minutes.')
+        
+        if u in USERS:
+            password_ok = verify_password(USERS[u]['password_hash'], p)
+        else:
+            # Unknown user - pay the same hash cost so timing is uniform
+            verify_password(DUMMY_PASSWORD_HASH, p)
+            password_ok = False
         
-        if u in USERS and check_password_hash(USERS[u]['password_hash'], p):
+        if password_ok:
             clear_failed_logins(u)  # Reset on successful login
+            # Upgrade older PBKDF2 hashes now that we have the plaintext
+            if ARGON2_AVAILABLE and not USERS[u]['password_hash'].startswith('$argon2'):
+                USERS[u]['password_hash'] = hash_password(p)
+                save_users()
             login_user(User(u), remember=remember)
             session.permanent = True  # Use permanent session with secure settings
             print(f"User logged in: {u} (remember={remember})")
@@ -9777,13 +10603,15 @@ def login():
         
         # Record failed attempt
         record_failed_login(u)
-        remaining = MAX_FAILED_ATTEMPTS - failed_login_attempts.get(u, (0, None))[0]
+        remaining = MAX_FAILED_ATTEMPTS - count_recent_failures(u)
         if remaining <= 2:
-            return render_template_string(LOGIN_PAGE, error=f'Invalid credentials. {remaining} attempts remaining.', success=None)
-        return render_template_string(LOGIN_PAGE, error='Invalid username or password', success=None)
+            return login_error(f'Invalid credentials. {remaining} attempts remaining.')
+        return login_error('Invalid username or password')
     
     success = request.args.get('success')
-    return render_template_string(LOGIN_PAGE, error=None, success=success)
+    if not success:
+        return token_page_response(LOGIN_PAGE_CACHE)
+    return render_template(LOGIN_TEMPLATE, error=None, success=success)
 
 @app.route('/signup', methods=['GET', 'POST'])
 @limiter.limit("10 per hour")  # Rate limit signup to prevent spam
@@ -9799,26 +10627,26 @@ def signup():
         
         # Validation
         if not name or not username or not password:
-            return render_template_string(SIGNUP_PAGE, error='All fields are required')
+            return render_template(SIGNUP_TEMPLATE, error='All fields are required')
         
         if len(username) < 3:
-            return render_template_string(SIGNUP_PAGE, error='Username must be at least 3 characters')
+            return render_template(SIGNUP_TEMPLATE, error='Username must be at least 3 characters')
         
         if not username.replace('_', '').isalnum():
-            return render_template_string(SIGNUP_PAGE, error='Username can only contain letters, numbers, and underscores')
+            return render_template(SIGNUP_TEMPLATE, error='Username can only contain letters, numbers, and underscores')
         
         if len(password) < 4:
-            return render_template_string(SIGNUP_PAGE, error='Password must be at least 4 characters')
+            return render_template(SIGNUP_TEMPLATE, error='Password must be at least 4 characters')
         
         if password != password2:
-            return render_template_string(SIGNUP_PAGE, error='Passwords do not match')
+            return render_template(SIGNUP_TEMPLATE, error='Passwords do not match')
         
         if username in USERS:
-            return render_template_string(SIGNUP_PAGE, error='Username already taken')
+            return render_template(SIGNUP_TEMPLATE, error='Username already taken')
         
         # Create the user
         USERS[username] = {
-            'password_hash': generate_password_hash(password, method='pbkdf2:sha256'),
+            'password_hash': hash_password(password),
             'name': name
         }
         save_users()
@@ -9826,7 +10654,7 @@ def signup():
         
         return redirect(url_for('login', success='Account created! Please sign in.'))
     
-    return render_template_string(SIGNUP_PAGE, error=None)
+    return render_template(SIGNUP_TEMPLATE, error=None)
 
 @app.route('/logout')
 @login_required
@@ -9836,7 +10664,7 @@ def logout():
 
 @app.route('/health')
 def health():
-    return jsonify({'status': 'ok', 'devices': len(devices)})
+    return jsonify({'status': 'ok', 'devices': len(devices), 'heartbeat_dropped_total': heartbeat_dropped_total})
 
 # ============================================================================
 # CHROME EXTENSION EVENTS
@@ -10261,26 +11089,65 @@ def send_to_ai():
         print(f"[SEND-TO-AI] Error: {e}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
-@app.route('/favicon.ico')
-def favicon():
-    """Return a simple SVG favicon"""
-    svg = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">
+# ============================================================================
+# STATIC DOWNLOADS - built once per server URL and served with ETags
+# ============================================================================
+
+def accepts_gzip():
+    """True if the current request allows a gzip-encoded response"""
+    return request.accept_encodings.quality('gzip') > 0
+
+def static_payload(body):
+    """Precompute what static_response needs for a fixed body; returns (bytes, etag, gzipped bytes)"""
+    return body, hashlib.sha256(body).hexdigest()[:32], gzip.compress(body, compresslevel=9)
+
+def static_response(body, mimetype, etag, filename=None, max_age=3600, gz=None):
+    """Wrap a prebuilt payload with caching headers; answers If-None-Match with a 304.
+    When a pre-gzipped copy is given it is sent as-is to clients that accept gzip."""
+    if gz is not None and accepts_gzip():
+        response = Response(gz, mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(etag, weak=True)
+    else:
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+    if gz is not None:
+        response.vary.add('Accept-Encoding')
+    if filename:
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['Cache-Control'] = f'public, max-age={max_age}'
+    return response.make_conditional(request)
+
+@lru_cache(maxsize=32)
+def render_installer(template, server_url):
+    """Fill {{SERVER_URL}} into an installer template once per host; returns (bytes, etag, gzipped bytes)"""
+    return static_payload(template.replace('{{SERVER_URL}}', server_url).encode('utf-8'))
+
+def installer_response(template, filename=None, mimetype='application/octet-stream', https=True, max_age=3600):
+    """Serve an installer script for the requesting host"""
+    server_url = request.host_url.rstrip('/')
+    if https:
+        server_url = server_url.replace('http://', 'https://')
+    body, etag, gz = render_installer(template, server_url)
+    return static_response(body, mimetype, etag, filename=filename, max_age=max_age, gz=gz)
+
+FAVICON_SVG = b'''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">
         <rect width="100" height="100" rx="20" fill="#0a0a0f"/>
         <circle cx="50" cy="45" r="25" fill="#00f5d4"/>
         <rect x="45" y="65" width="10" height="20" rx="2" fill="#00f5d4"/>
     </svg>'''
-    return Response(svg, mimetype='image/svg+xml')
+FAVICON_ETAG = hashlib.sha256(FAVICON_SVG).hexdigest()[:32]
 
-@app.route('/download/mac')
-def download_mac_app():
-    """Download a double-clickable .command file for Mac"""
-    server_url = request.host_url.rstrip('/').replace('http://', 'https://')
-    
-    script = '''#!/bin/bash
+@app.route('/favicon.ico')
+def favicon():
+    """Return a simple SVG favicon"""
+    return static_response(FAVICON_SVG, 'image/svg+xml', FAVICON_ETAG, max_age=86400)
+
+MAC_INSTALLER = '''#!/bin/bash
 # Voice Hub Desktop Client
 # Just double-click this file to install and run!
 
-SERVER_URL="''' + server_url + '''"
+SERVER_URL="{{SERVER_URL}}"
 
 clear
 echo ""
@@ -10335,21 +11202,17 @@ python3 voice_hub_client.py
 echo ""
 read -p "Press Enter to close..."
 '''
-    
-    response = Response(script, mimetype='application/octet-stream')
-    response.headers['Content-Disposition'] = 'attachment; filename=VoiceHub.command'
-    return response
 
-@app.route('/download/windows')
-def download_windows_app():
-    """Download a double-clickable .bat file for Windows"""
-    server_url = request.host_url.rstrip('/').replace('http://', 'https://')
-    
-    script = '''@echo off
+@app.route('/download/mac')
+def download_mac_app():
+    """Download a double-clickable .command file for Mac"""
+    return installer_response(MAC_INSTALLER, 'VoiceHub.command')
+
+WINDOWS_INSTALLER = '''@echo off
 title Voice Hub Desktop Client
 color 0A
 
-set SERVER_URL=''' + server_url + '''
+set SERVER_URL={{SERVER_URL}}
 
 echo.
 echo  Voice Hub Desktop Client Installer
@@ -10405,20 +11268,16 @@ python voice_hub_client.py
 echo.
 pause
 '''
-    
-    response = Response(script, mimetype='application/octet-stream')
-    response.headers['Content-Disposition'] = 'attachment; filename=VoiceHub.bat'
-    return response
 
-@app.route('/download/linux')
-def download_linux_app():
-    """Download a shell script for Linux"""
-    server_url = request.host_url.rstrip('/').replace('http://', 'https://')
-    
-    shell_script = '''#!/bin/bash
+@app.route('/download/windows')
+def download_windows_app():
+    """Download a double-clickable .bat file for Windows"""
+    return installer_response(WINDOWS_INSTALLER, 'VoiceHub.bat')
+
+LINUX_INSTALLER = '''#!/bin/bash
 # Voice Hub Desktop Client for Linux
 
-SERVER_URL="''' + server_url + '''"
+SERVER_URL="{{SERVER_URL}}"
 
 cd ~/.voicehub 2>/dev/null || mkdir -p ~/.voicehub && cd ~/.voicehub
 
@@ -10430,46 +11289,185 @@ fi
 
 python3 voice_hub_client.py
 '''
-    
-    response = Response(shell_script, mimetype='application/octet-stream')
-    response.headers['Content-Disposition'] = 'attachment; filename=voicehub.sh'
-    return response
+
+@app.route('/download/linux')
+def download_linux_app():
+    """Download a shell script for Linux"""
+    return installer_response(LINUX_INSTALLER, 'voicehub.sh')
+
+@lru_cache(maxsize=8)
+def render_install_page(server_url):
+    """Render and compress the install page once per host (it only depends on the server URL)"""
+    return static_payload(INSTALL_TEMPLATE.render(server=server_url).encode('utf-8'))
 
 @app.route('/install')
 def install_page():
     """Show easy install instructions"""
-    server_url = request.host_url.rstrip('/')
-    return render_template_string(INSTALL_PAGE, server=server_url)
+    body, etag, gz = render_install_page(request.host_url.rstrip('/'))
+    return static_response(body, 'text/html', etag, gz=gz)
 
 # Desktop client version - increment this when you update the client
 CLIENT_VERSION = "1.5.0"
+DESKTOP_CLIENT_TEMPLATE = DESKTOP_CLIENT.replace('{{VERSION}}', CLIENT_VERSION)
 
 # ============================================================================
 # CLAUDE AI COMMAND PARSING - ADAPTIVE & CONTEXT-AWARE
 # ============================================================================
 
 # Store conversation history per session (in-memory, resets on restart)
-# Key: session_id, Value: list of {role, content, timestamp}
-conversation_history = {}
+# Key: session_id, Value: deque of Msg(role, content, timestamp) that drops the oldest when full
+# With Redis configured, history lives in per-session lists (hist:<session_id>) shared by all
+# workers and expiring after HISTORY_TTL of silence; the in-process structures go unused
+# Session ids come from the client, so sessions are kept in LRU order and the
+# least recently used one is evicted past MAX_HISTORY_SESSIONS
+conversation_history = OrderedDict()
 MAX_HISTORY_LENGTH = 20  # Keep last 20 exchanges for context
+MAX_HISTORY_SESSIONS = 1024
+HISTORY_TTL = 3600  # seconds (Redis only)
+# Guards the LRU bookkeeping only; appends to a session's deque are atomic on their own
+history_lock = threading.Lock()
+
+# Long conversations are condensed: once a session reaches SUMMARIZE_AFTER turns, everything
+# but the last HISTORY_VERBATIM_TURNS is folded into a short rolling summary (gpt-4o-mini)
+# and dropped, so the per-request history stays small and its prefix rarely changes
+SUMMARIZE_AFTER = 12
+HISTORY_VERBATIM_TURNS = 4
+session_summaries = {}  # session_id -> summary text
+summarizing = set()     # sessions with a summary job in flight
+
+class Msg(NamedTuple):
+    """One conversation turn - a tuple is far smaller than a dict per message"""
+    role: str
+    content: bytes  # UTF-8, stripped; decoded only when sent to the model
+    timestamp: float
 
 def get_session_history(session_id):
     """Get conversation history for a session"""
-    if session_id not in conversation_history:
-        conversation_history[session_id] = []
-    return conversation_history[session_id]
+    with history_lock:
+        history = conversation_history.get(session_id)
+        if history is None:
+            history = conversation_history[session_id] = deque(maxlen=MAX_HISTORY_LENGTH)
+            if len(conversation_history) > MAX_HISTORY_SESSIONS:
+                evicted, _ = conversation_history.popitem(last=False)
+                session_summaries.pop(evicted, None)
+        else:
+            conversation_history.move_to_end(session_id)
+        return history
+
+def load_history(session_id):
+    """Snapshot of a session's history as a tuple of Msg, oldest first"""
+    if redis_client:
+        return tuple(Msg(role, content.encode('utf-8'), ts)
+                     for role, content, ts in map(json_loads, run_blocking(redis_client.lrange, f'hist:{session_id}', 0, -1)))
+    # Snapshot - iterating the live deque while another request appends would raise
+    return tuple(get_session_history(session_id))
 
 def add_to_history(session_id, role, content):
     """Add a message to conversation history"""
-    history = get_session_history(session_id)
-    history.append({
-        'role': role,
-        'content': content,
-        'timestamp': time.time()
-    })
-    # Keep only the last N messages
-    if len(history) > MAX_HISTORY_LENGTH:
-        conversation_history[session_id] = history[-MAX_HISTORY_LENGTH:]
+    content = (content or '').strip()
+    if redis_client:
+        # Append + trim + refresh expiry in one round-trip
+        key = f'hist:{session_id}'
+        pipe = redis_client.pipeline()
+        pipe.rpush(key, json.dumps([role, content, time.time()]))
+        pipe.ltrim(key, -MAX_HISTORY_LENGTH, -1)
+        pipe.expire(key, HISTORY_TTL)
+        length = run_blocking(pipe.execute)[0]
+    else:
+        history = get_session_history(session_id)
+        history.append(Msg(role, content.encode('utf-8'), time.time()))
+        length = len(history)
+    if length >= SUMMARIZE_AFTER and OPENAI_AVAILABLE and openai_client:
+        # Check-and-claim atomically so two concurrent turns can't both start a summary
+        with history_lock:
+            if session_id in summarizing:
+                return
+            summarizing.add(session_id)
+        ai_executor.submit(summarize_history, session_id)
+
+def get_summary(session_id):
+    """Rolling summary of a session's older turns, or None"""
+    if redis_client:
+        summary = run_blocking(redis_client.get, f'hist-summary:{session_id}')
+        return summary.decode('utf-8') if summary else None
+    return session_summaries.get(session_id)
+
+def save_redis_summary(session_id, summary, summarized):
+    """Store a session's summary and drop exactly the summarized turns from its Redis list.
+    
+    Turns may have been appended (and the head trimmed) while the summary was generated, so
+    the trim is measured against the current list head under WATCH, retrying on conflict.
+    """
+    key = f'hist:{session_id}'
+    summarized = set(summarized)
+    with redis_client.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(key)
+                head = pipe.lrange(key, 0, len(summarized) - 1)
+                if not head:
+                    pipe.unwatch()
+                    return  # History was cleared meanwhile - don't bring back a summary
+                drop = 0
+                for entry in head:
+                    if entry not in summarized:
+                        break
+                    drop += 1
+                pipe.multi()
+                pipe.set(f'hist-summary:{session_id}', summary, ex=HISTORY_TTL)
+                pipe.ltrim(key, drop, -1)
+                pipe.execute()
+                return
+            except redis.WatchError:
+                continue
+
+def summarize_history(session_id):
+    """Fold all but the last few turns of a session into its rolling summary (runs on ai_executor)"""
+    try:
+        if redis_client:
+            # Keep the raw entries: they identify exactly which turns get trimmed afterwards
+            older_raw = redis_client.lrange(f'hist:{session_id}', 0, -1)[:-HISTORY_VERBATIM_TURNS]
+            older = tuple(Msg(role, content.encode('utf-8'), ts)
+                          for role, content, ts in map(json_loads, older_raw))
+        else:
+            # Read without get_session_history, which would recreate a session evicted meanwhile
+            with history_lock:
+                older = tuple(conversation_history.get(session_id, ()))[:-HISTORY_VERBATIM_TURNS]
+        if not older:
+            return
+        transcript = '\n'.join(f"{m.role}: {m.content.decode('utf-8')}" for m in older)
+        previous = get_summary(session_id)
+        if previous:
+            transcript = f"Summary so far: {previous}\n{transcript}"
+        response = openai_client.chat.completions.create(
+            model="gpt-4o-mini",
+            max_tokens=150,
+            temperature=0,
+            timeout=AI_TIMEOUT,
+            messages=[
+                {"role": "system", "content": "Summarize this voice assistant conversation in at most 2 sentences. "
+                                              "Keep app names, pending tasks and anything the user might refer back to."},
+                {"role": "user", "content": transcript}
+            ]
+        )
+        summary = response.choices[0].message.content.strip()
+        if redis_client:
+            save_redis_summary(session_id, summary, older_raw)
+            return
+        with history_lock:
+            history = conversation_history.get(session_id)
+            if history is None:
+                return  # Session was evicted while we summarized - don't resurrect it
+            session_summaries[session_id] = summary
+            # Drop exactly the turns that were summarized - anything appended meanwhile stays
+            older_ids = {id(m) for m in older}
+            while history and id(history[0]) in older_ids:
+                history.popleft()
+    except Exception as e:
+        logger.error("History summary failed for %s: %s", session_id, e)
+    finally:
+        with history_lock:
+            summarizing.discard(session_id)
 
 def format_history_for_claude(session_id, limit=10):
     """Format recent history as message objects for Claude API.
@@ -10477,25 +11475,44 @@ def format_history_for_claude(session_id, limit=10):
     Returns a list of message dicts with proper alternating user/assistant roles.
     Ensures no two consecutive messages have the same role.
     """
-    history = get_session_history(session_id)[-limit:]
+    history = load_history(session_id)
     if not history:
         return []
+    summary = get_summary(session_id)
+    
+    # Fast path for the first turn of a conversation - nothing to merge
+    if len(history) == 1 and not summary:
+        msg = history[0]
+        if not msg.content:
+            return []
+        role = 'assistant' if msg.role == 'jarvis' else msg.role
+        message = {'role': role, 'content': msg.content.decode('utf-8')}
+        if role == 'assistant':
+            return [{'role': 'user', 'content': '(continuing conversation)'}, message]
+        return [message]
+    
+    history = history[-limit:]
+    if summary:
+        # The condensed older turns go first as a single synthetic user turn
+        history = (Msg('user', f"(Earlier in this conversation: {summary})".encode('utf-8'), 0),) + history
     
     messages = []
     last_role = None
     
     for msg in history:
         # Map 'jarvis' to 'assistant' for Claude API
-        role = 'assistant' if msg['role'] == 'jarvis' else msg['role']
-        content = msg.get('content', '').strip()
-        
-        if not content:
+        role = 'assistant' if msg.role == 'jarvis' else msg.role
+        if not msg.content:
             continue
+        content = msg.content.decode('utf-8')
             
         # Handle consecutive same-role messages by merging
         if role == last_role and messages:
-            # Merge with previous message
-            messages[-1]['content'] += f"\n{content}"
+            # Collect the run and join once below instead of re-concatenating per message
+            parts = messages[-1].get('content_parts')
+            if parts is None:
+                parts = messages[-1]['content_parts'] = [messages[-1]['content']]
+            parts.append(content)
         else:
             messages.append({
                 'role': role,
@@ -10503,6 +11520,10 @@ def format_history_for_claude(session_id, limit=10):
             })
             last_role = role
     
+    for m in messages:
+        if 'content_parts' in m:
+            m['content'] = "\n".join(m.pop('content_parts'))
+    
     # Claude API requires messages to start with 'user' role
     # If first message is 'assistant', prepend a context message
     if messages and messages[0]['role'] == 'assistant':
@@ -10513,17 +11534,10 @@ def format_history_for_claude(session_id, limit=10):
     
     return messages
 
-def build_adaptive_prompt(context=None):
-    """Build a dynamic, context-aware system prompt.
-    
-    Note: Conversation history is now passed as proper message turns in the API call,
-    not embedded in the system prompt. This gives Claude better context understanding.
-    """
-    
-    # Get the assistant's name from context (defaults to "Jarvis")
-    assistant_name = context.get('assistantName', 'Jarvis') if context else 'Jarvis'
-    
-    base_prompt = f"""You are {assistant_name}, a sophisticated AI assistant with a refined British personality. Think Tony Stark's JARVIS - intelligent, witty, warm yet professional, and effortlessly cool.
+@lru_cache(maxsize=32)
+def build_base_prompt(assistant_name):
+    """Build the static part of the system prompt - only the assistant name varies, so it's cached"""
+    return f"""You are {assistant_name}, a sophisticated AI assistant with a refined British personality. Think Tony Stark's JARVIS - intelligent, witty, warm yet professional, and effortlessly cool.
 
 PERSONALITY:
 - British, refined, slightly formal but never stiff
@@ -10669,47 +11683,6 @@ APP RECOGNITION (flexible - match these even if misspoken):
 - copilot/co-pilot/pilot = "copilot"
 - gemini/jiminy = "gemini"
 
-EXAMPLE RESPONSES:
-
-User: "open YouTube"
-> {{"correctedText":"open YouTube","action":"open_url","content":"https://youtube.com","response":"Opening YouTube","speak":"Pulling up YouTube for you now."}}
-
-User: "coarser right a function that adds two numbers" (speech recognition errors)
-> {{"correctedText":"cursor write a function that adds two numbers","targetApp":"cursor","action":"type","content":"function add(a, b) {{ return a + b; }}","response":"Writing to Cursor","speak":"Certainly. Writing that function to Cursor."}}
-
-User: "cloud explain what an api is" (mishearing of "claude")
-> {{"correctedText":"claude explain what an API is","targetApp":"claude","action":"send_to_ai","content":"explain what an API is","response":"Sending to Claude","speak":"Sending that to Claude for you."}}
-
-User: "cursor write a function that returns there name" (homophone error)
-> {{"correctedText":"cursor write a function that returns their name","targetApp":"cursor","action":"type","content":"function getName(user) {{ return user.name; }}","response":"Writing to Cursor","speak":"Writing that to Cursor now."}}
-
-User: "ask cursor how do I fix this bug"
-> {{"targetApp":"cursor","action":"type_and_send","content":"how do I fix this bug","response":"Asking Cursor","speak":"Sending that to Cursor now."}}
-
-User: "ask claude what is the capital of France"
-> {{"targetApp":"claude","action":"send_to_ai","content":"what is the capital of France","response":"Sending to Claude","speak":"Sending that question to Claude in your browser."}}
-
-User: "tell chatgpt to explain recursion"
-> {{"targetApp":"chatgpt","action":"send_to_ai","content":"explain recursion","response":"Sending to ChatGPT","speak":"Sending that to ChatGPT now."}}
-
-User: "claude help me write a poem"
-> {{"targetApp":"claude","action":"send_to_ai","content":"help me write a poem","response":"Sending to Claude","speak":"Passing that to Claude for you."}}
-
-User: "what did claude say"
-> {{"targetApp":"claude","action":"read_response","response":"Reading Claude","speak":"Let me read that for you."}}
-
-User: "read the response" or "read that back"
-> {{"action":"read_response","response":"Reading response","speak":"Reading the last response."}}
-
-User: "what's the weather like"
-> {{"action":"search","content":"weather forecast","response":"Searching weather","speak":"Let me check that for you. Searching now."}}
-
-User: "do that again"
-> {{"action":"repeat","response":"Repeating","speak":"Of course. Running that again."}}
-
-User: "terminal run npm install"
-> {{"targetApp":"terminal","action":"run","content":"npm install","response":"Running npm install","speak":"Running npm install in the terminal."}}
-
 IMPORTANT - BE LENIENT:
 - ONLY use "clarify" if the text is truly gibberish or empty
 - If you can guess what the user wants, DO IT. Don't ask for clarification.
@@ -10743,6 +11716,56 @@ Remember: ALWAYS be conversational in "speak". You're {assistant_name}, not a ro
 
 Return ONLY valid JSON."""
 
+# Warm the cache for the default name at import
+build_base_prompt('Jarvis')
+
+# Worked examples, sent as fixed user/assistant turns ahead of the conversation
+# rather than inside the system prompt, so they form a stable cacheable prefix
+FEW_SHOT_EXAMPLES = [
+    ('open YouTube',
+     '{"correctedText":"open YouTube","action":"open_url","content":"https://youtube.com","response":"Opening YouTube","speak":"Pulling up YouTube for you now."}'),
+    ('coarser right a function that adds two numbers',
+     '{"correctedText":"cursor write a function that adds two numbers","targetApp":"cursor","action":"type","content":"function add(a, b) { return a + b; }","response":"Writing to Cursor","speak":"Certainly. Writing that function to Cursor."}'),
+    ('cloud explain what an api is',
+     '{"correctedText":"claude explain what an API is","targetApp":"claude","action":"send_to_ai","content":"explain what an API is","response":"Sending to Claude","speak":"Sending that to Claude for you."}'),
+    ('cursor write a function that returns there name',
+     '{"correctedText":"cursor write a function that returns their name","targetApp":"cursor","action":"type","content":"function getName(user) { return user.name; }","response":"Writing to Cursor","speak":"Writing that to Cursor now."}'),
+    ('ask cursor how do I fix this bug',
+     '{"targetApp":"cursor","action":"type_and_send","content":"how do I fix this bug","response":"Asking Cursor","speak":"Sending that to Cursor now."}'),
+    ('ask claude what is the capital of France',
+     '{"targetApp":"claude","action":"send_to_ai","content":"what is the capital of France","response":"Sending to Claude","speak":"Sending that question to Claude in your browser."}'),
+    ('tell chatgpt to explain recursion',
+     '{"targetApp":"chatgpt","action":"send_to_ai","content":"explain recursion","response":"Sending to ChatGPT","speak":"Sending that to ChatGPT now."}'),
+    ('claude help me write a poem',
+     '{"targetApp":"claude","action":"send_to_ai","content":"help me write a poem","response":"Sending to Claude","speak":"Passing that to Claude for you."}'),
+    ('what did claude say',
+     '{"targetApp":"claude","action":"read_response","response":"Reading Claude","speak":"Let me read that for you."}'),
+    ('read the response',
+     '{"action":"read_response","response":"Reading response","speak":"Reading the last response."}'),
+    ("what's the weather like",
+     '{"action":"search","content":"weather forecast","response":"Searching weather","speak":"Let me check that for you. Searching now."}'),
+    ('do that again',
+     '{"action":"repeat","response":"Repeating","speak":"Of course. Running that again."}'),
+    ('terminal run npm install',
+     '{"targetApp":"terminal","action":"run","content":"npm install","response":"Running npm install","speak":"Running npm install in the terminal."}'),
+]
+FEW_SHOT = [
+    turn
+    for command, reply in FEW_SHOT_EXAMPLES
+    for turn in ({"role": "user", "content": f"Parse this voice command: \"{command}\""},
+                 {"role": "assistant", "content": reply})
+]
+
+def build_adaptive_prompt(context=None):
+    """Build a dynamic, context-aware system prompt.
+    
+    Note: Conversation history is now passed as proper message turns in the API call,
+    not embedded in the system prompt. This gives Claude better context understanding.
+    """
+    
+    # Get the assistant's name from context (defaults to "Jarvis")
+    assistant_name = context.get('assistantName', 'Jarvis') if context else 'Jarvis'
+    
     # Add context section if provided
     context_section = ""
     if context:
@@ -10758,7 +11781,379 @@ CURRENT SESSION CONTEXT:
     # Note: Conversation history is now passed as proper message turns in the API call,
     # not embedded in the system prompt. This gives Claude better context understanding.
 
-    return base_prompt + context_section
+    return build_base_prompt(str(assistant_name)) + context_section
+
+class Command(NamedTuple):
+    """A voice command after preprocessing"""
+    text: str        # sanitized input, as sent to the model
+    normalized: str  # stripped + lowercased, for fast-path lookups and cache keys
+
+@lru_cache(maxsize=4096)
+def preprocess_command(raw):
+    """Sanitize and normalize a command once; repeat commands hit the cache"""
+    text = sanitize_input(raw, max_length=1000)
+    return Command(text, text.strip().lower())
+
+# Canned replies for trivial inputs (the same ones the system prompt spells out),
+# answered without a model round-trip. Keys are lowercased with trailing punctuation stripped.
+GREETING_REPLY = {'action': None, 'speak': 'Hello! What can I help you with?', 'response': 'Greeting'}
+CONFIRMED_REPLY = {'action': None, 'speak': 'Loud and clear! What would you like me to do?', 'response': 'Confirmed'}
+HELP_REPLY = {'action': None, 'speak': 'I can open apps, type in Cursor, search the web, run terminal commands - just tell me what you need.', 'response': 'Help'}
+GREETING_TABLE = {
+    'hey': GREETING_REPLY,
+    'hi': GREETING_REPLY,
+    'hello': GREETING_REPLY,
+    "what's up": GREETING_REPLY,
+    'whats up': GREETING_REPLY,
+    'can you hear me': CONFIRMED_REPLY,
+    'test': CONFIRMED_REPLY,
+    'testing': CONFIRMED_REPLY,
+    'is this working': CONFIRMED_REPLY,
+    'what can you do': HELP_REPLY,
+    'help': HELP_REPLY,
+}
+
+# "open <site>" is answered locally too. Misheard variants map to a canonical site
+# and are matched by one precompiled regex (longest alias first).
+SITE_ALIASES = {
+    'youtube': 'youtube', 'you tube': 'youtube',
+    'google': 'google',
+    'github': 'github', 'git hub': 'github', 'get hub': 'github',
+    'gmail': 'gmail', 'g mail': 'gmail',
+    'reddit': 'reddit',
+}
+SITES = {
+    'youtube': ('YouTube', 'https://youtube.com'),
+    'google': ('Google', 'https://google.com'),
+    'github': ('GitHub', 'https://github.com'),
+    'gmail': ('Gmail', 'https://mail.google.com'),
+    'reddit': ('Reddit', 'https://reddit.com'),
+}
+OPEN_SITE_RE = re.compile(
+    r'^(?:open|go to|launch|pull up)\s+(' + '|'.join(sorted(map(re.escape, SITE_ALIASES), key=len, reverse=True)) + r')[.!?]*$',
+    re.IGNORECASE
+)
+
+def match_open_site(text):
+    """Return a canned open_url response for "open youtube"-style commands, else None"""
+    m = OPEN_SITE_RE.match(text.strip())
+    if not m:
+        return None
+    name, url = SITES[SITE_ALIASES[m.group(1).lower()]]
+    return {'correctedText': f'open {name}', 'action': 'open_url', 'content': url,
+            'response': f'Opening {name}', 'speak': f'Pulling up {name} for you now.'}
+
+# Parsed responses for repeated commands, keyed on (command, context). Only used
+# near the start of a conversation - with longer histories every turn's context differs.
+RESPONSE_CACHE_TTL = 300  # seconds
+MAX_RESPONSE_CACHE = 4096
+RESPONSE_CACHE_MAX_HISTORY = 2
+response_cache = OrderedDict()  # key -> (expires_at, parsed)
+
+def get_cached_response(key):
+    """Return a cached parse for key if it hasn't expired"""
+    entry = response_cache.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time.time():
+        del response_cache[key]
+        return None
+    response_cache.move_to_end(key)
+    return entry[1]
+
+def cache_response(key, parsed):
+    """Store a parse result, evicting the least recently used entry when full"""
+    response_cache[key] = (time.time() + RESPONSE_CACHE_TTL, parsed)
+    response_cache.move_to_end(key)
+    if len(response_cache) > MAX_RESPONSE_CACHE:
+        response_cache.popitem(last=False)
+
+# Provider calls run on gevent's thread pool so a slow or dead provider can be hedged
+# without blocking the hub (the app isn't monkey-patched)
+AI_HEDGE_DELAY = 2.0  # seconds GPT-4o gets before Claude is raced against it
+AI_TIMEOUT = 8.0      # overall budget per command
+ai_executor = ThreadPoolExecutor(max_workers=8)
+
+class ChatBatcher:
+    """Coalesces identical in-flight chat completions into one upstream request"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}  # request key -> AsyncResult shared by every caller
+
+    def submit(self, **kwargs):
+        key = json.dumps(kwargs, sort_keys=True)
+        with self.lock:
+            result = self.pending.get(key)
+            if result is None:
+                result = spawn_blocking(openai_client.chat.completions.create, **kwargs)
+                self.pending[key] = result
+                result.rawlink(lambda r: self.release(key, r))
+        return result
+
+    def create(self, timeout=AI_TIMEOUT, **kwargs):
+        """Run (or join) a chat completion, waiting through gevent so other greenlets keep running"""
+        result = self.submit(**kwargs)
+        if not gevent.wait([result], timeout=timeout):
+            raise TimeoutError("chat completion timed out")
+        return result.get()
+
+    def release(self, key, result):
+        with self.lock:
+            if self.pending.get(key) is result:
+                del self.pending[key]
+
+chat_batcher = ChatBatcher()
+
+def call_openai(system_prompt, messages):
+    """Parse with GPT-4o; returns the raw response text"""
+    # OpenAI format: system message is part of messages array
+    openai_messages = [{"role": "system", "content": system_prompt}] + messages
+    response = openai_client.chat.completions.create(
+        model="gpt-4o",  # Fast + smart
+        max_tokens=1024,
+        messages=openai_messages,
+        temperature=0.3,  # Lower for more consistent command parsing
+        response_format={"type": "json_object"},  # Guaranteed bare JSON - no fences to strip
+        timeout=AI_TIMEOUT
+    )
+    response_text = response.choices[0].message.content.strip()
+    logger.debug("GPT-4o RAW RESPONSE: %s", response_text)
+    return response_text
+
+CLAUDE_CACHE_MIN_HISTORY = 4  # history turns before the conversation prefix is worth caching too
+
+def call_claude(system_prompt, messages):
+    """Parse with Claude; returns the raw response text"""
+    # The system prompt is near-identical on every call - mark it for prompt caching
+    system = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+    # ...and so are the few-shot turns right after it
+    last_example = messages[len(FEW_SHOT) - 1]
+    messages = messages[:len(FEW_SHOT) - 1] + [{
+        "role": last_example["role"],
+        "content": [{"type": "text", "text": last_example["content"], "cache_control": {"type": "ephemeral"}}]
+    }] + messages[len(FEW_SHOT):]
+    if len(messages) - len(FEW_SHOT) > CLAUDE_CACHE_MIN_HISTORY:
+        # Cache the history prefix as well: breakpoint on the turn before the new command
+        prefix = messages[-2]
+        messages = messages[:-2] + [{
+            "role": prefix["role"],
+            "content": [{"type": "text", "text": prefix["content"], "cache_control": {"type": "ephemeral"}}]
+        }, messages[-1]]
+    message = claude_client.messages.create(
+        model="claude-sonnet-4-20250514",  # Sonnet 4 - fast + smart
+        max_tokens=1024,
+        messages=messages,
+        system=system,
+        timeout=AI_TIMEOUT
+    )
+    response_text = message.content[0].text.strip()
+    # Claude has no JSON mode - remove markdown code blocks if it added them
+    if response_text.startswith('```'):
+        response_text = response_text.split('\n', 1)[-1]
+    if response_text.endswith('```'):
+        response_text = response_text[:-3].strip()
+    usage = getattr(message, 'usage', None)
+    if usage:
+        logger.debug("CLAUDE CACHE: read=%s written=%s input=%s", getattr(usage, 'cache_read_input_tokens', 0),
+                     getattr(usage, 'cache_creation_input_tokens', 0), usage.input_tokens)
+    logger.debug("CLAUDE RAW RESPONSE: %s", response_text)
+    return response_text
+
+def first_success(pending, timeout):
+    """Wait for the first of {AsyncResult: provider} to succeed; returns (value, provider).
+    
+    Waits through gevent, so only this greenlet sleeps - the provider calls themselves run on
+    gevent's thread pool. Failures are logged and dropped from pending; raises the last error,
+    or TimeoutError if nothing succeeded within timeout.
+    """
+    error = None
+    deadline = time.time() + timeout
+    while pending:
+        done = gevent.wait(list(pending), timeout=max(0, deadline - time.time()), count=1)
+        if not done:
+            raise TimeoutError(f"{' / '.join(pending.values())} timed out")
+        for result in done:
+            provider = pending.pop(result)
+            if result.successful():
+                return result.value, provider
+            error = result.exception
+            logger.error("%s failed: %s", provider, error)
+    raise error
+
+def ask_ai(system_prompt, messages):
+    """Get a parse from whichever provider answers first.
+    
+    GPT-4o is tried first. If it fails, or hasn't answered within AI_HEDGE_DELAY,
+    Claude is started too and the first successful response wins (the loser's
+    result is ignored). Returns (response_text, provider), or (None, None) when no
+    provider is configured; raises the last error if every provider failed.
+    """
+    pending = {}
+    if OPENAI_AVAILABLE and openai_client:
+        openai_result = spawn_blocking(call_openai, system_prompt, messages)
+        pending[openai_result] = 'gpt-4o'
+        if gevent.wait([openai_result], timeout=AI_HEDGE_DELAY) and openai_result.successful():
+            return openai_result.value, 'gpt-4o'
+    
+    if CLAUDE_AVAILABLE and claude_client:
+        pending[spawn_blocking(call_claude, system_prompt, messages)] = 'claude'
+    
+    if not pending:
+        return None, None
+    return first_success(pending, AI_TIMEOUT)
+
+NO_AI_RESULT = {
+    'action': 'clarify',
+    'speak': 'No AI configured. Add OPENAI_API_KEY or ANTHROPIC_API_KEY.',
+    'response': 'No AI',
+    'needsClarification': True
+}
+
+def ai_error_result(e):
+    """Clarify response for a failed provider call"""
+    return {
+        'action': 'clarify',
+        'speak': f'AI error: {str(e)[:50]}',
+        'response': 'AI error',
+        'needsClarification': True
+    }
+
+# Fields the dashboard reads from a parse, with the types it expects
+PARSED_COMMAND_FIELDS = {
+    'correctedText': str,
+    'targetApp': str,
+    'action': str,
+    'content': str,
+    'response': str,
+    'speak': str,
+    'needsClarification': bool,
+    'isStopCommand': bool,
+}
+
+def coerce_field(value, expected):
+    """Convert an obviously-meant scalar to the expected type; None when it can't be trusted"""
+    if expected is bool:
+        if isinstance(value, str):
+            return {'true': True, 'false': False}.get(value.strip().lower())
+        return None
+    if expected is str and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return None  # lists/objects would turn into junk text that gets typed or spoken
+
+def finish_parse(response_text, text, session_id, cache_key):
+    """Turn raw model output into the response dict, recording history and the cache entry"""
+    if response_text is None:
+        return NO_AI_RESULT
+    
+    # Try to parse as JSON - anything but an object is treated like non-JSON
+    try:
+        parsed = json_loads(response_text)
+        if not isinstance(parsed, dict):
+            raise json.JSONDecodeError("expected a JSON object", response_text, 0)
+    except json.JSONDecodeError:
+        # Claude returned non-JSON - treat as conversational response
+        logger.info("AI returned non-JSON: %s", response_text[:100])
+        add_to_history(session_id, 'jarvis', response_text[:100])
+        return {
+            'action': 'type',  # Default: just type what user said
+            'content': text,
+            'speak': response_text[:150] if len(response_text) < 200 else None,
+            'response': 'Processed',
+            'claude': True
+        }
+    
+    # Fix up the fields the dashboard reads so a sloppy model answer can't break it
+    for key, expected in PARSED_COMMAND_FIELDS.items():
+        value = parsed.get(key)
+        if value is not None and not isinstance(value, expected):
+            value = coerce_field(value, expected)
+            if value is None:
+                logger.warning("Dropping %s with unexpected type: %r", key, parsed[key])
+                del parsed[key]
+            else:
+                parsed[key] = value
+    parsed['claude'] = True
+    
+    # Don't cache clarifications - the user is about to rephrase
+    if cache_key and parsed.get('action') != 'clarify' and not parsed.get('needsClarification'):
+        cache_response(cache_key, dict(parsed))
+    
+    # Store Jarvis response in history for context
+    if parsed.get('response'):
+        add_to_history(session_id, 'jarvis', parsed.get('speak') or parsed.get('response'))
+    
+    return parsed
+
+# Matches a complete "speak" string value in partially streamed JSON
+SPEAK_FIELD_RE = re.compile(r'"speak"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+def sse_event(event, payload):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def open_openai_stream(system_prompt, messages):
+    """Start a streamed GPT-4o parse; returns (delta iterator, first delta or None)"""
+    stream = openai_client.chat.completions.create(
+        model="gpt-4o",
+        max_tokens=1024,
+        messages=[{"role": "system", "content": system_prompt}] + messages,
+        temperature=0.3,
+        response_format={"type": "json_object"},
+        timeout=AI_TIMEOUT,
+        stream=True
+    )
+    deltas = (chunk.choices[0].delta.content for chunk in stream
+              if chunk.choices and chunk.choices[0].delta.content)
+    return deltas, next(deltas, None)
+
+def stream_parse_command(system_prompt, messages, text, session_id, cache_key):
+    """SSE generator: a 'speak' event as soon as GPT-4o has written that field, then the full 'result'.
+    
+    The stream is read on gevent's thread pool, one delta at a time, so a slow stream only
+    holds up this response. Claude is hedged in exactly as in ask_ai: if GPT-4o hasn't produced
+    its first token within AI_HEDGE_DELAY, or fails, the first successful provider wins.
+    """
+    opening = spawn_blocking(open_openai_stream, system_prompt, messages)
+    pending = {opening: 'gpt-4o'}
+    if not (gevent.wait([opening], timeout=AI_HEDGE_DELAY) and opening.successful()):
+        if CLAUDE_AVAILABLE and claude_client:
+            pending[spawn_blocking(call_claude, system_prompt, messages)] = 'claude'
+    try:
+        value, provider = first_success(pending, AI_TIMEOUT)
+    except Exception as e:
+        yield sse_event('result', ai_error_result(e))
+        return
+    
+    if provider == 'claude':
+        response_text = value
+    else:
+        deltas, delta = value
+        buffer = ''
+        speak_sent = False
+        try:
+            while delta is not None:
+                buffer += delta
+                if not speak_sent:
+                    m = SPEAK_FIELD_RE.search(buffer)
+                    if m:
+                        speak_sent = True
+                        yield sse_event('speak', {'speak': json_loads('"' + m.group(1) + '"')})
+                delta = run_blocking(next, deltas, None)
+            response_text = buffer.strip()
+            logger.debug("GPT-4o RAW RESPONSE (streamed): %s", response_text)
+        except Exception as e:
+            logger.error("GPT-4o stream failed: %s, falling back to Claude", e)
+            if not (CLAUDE_AVAILABLE and claude_client):
+                yield sse_event('result', ai_error_result(e))
+                return
+            try:
+                response_text = run_blocking(call_claude, system_prompt, messages)
+            except Exception as e:
+                logger.error("claude failed: %s", e)
+                yield sse_event('result', ai_error_result(e))
+                return
+    yield sse_event('result', finish_parse(response_text, text, session_id, cache_key))
 
 @app.route('/api/parse-command', methods=['POST'])
 @csrf.exempt
@@ -10784,7 +12179,8 @@ def api_parse_command():
     except Exception:
         data = {}
     
-    text = sanitize_input(data.get('text', ''), max_length=1000)  # Sanitize and limit
+    command = preprocess_command(str(data.get('text') or ''))  # Sanitize and limit
+    text = command.text
     session_id = data.get('sessionId', 'default')
     
     # Get context about what user is doing
@@ -10795,12 +12191,9 @@ def api_parse_command():
         'assistantName': data.get('assistantName', 'Jarvis')
     }
     
-    print(f"========== PARSE COMMAND DEBUG ==========")
-    print(f"INPUT TEXT: '{text}'")
-    print(f"SESSION ID: {session_id}")
-    print(f"CONTEXT: {context}")
+    logger.debug("PARSE COMMAND: text=%r session=%s context=%s", text, session_id, context)
     
-    if not text or len(text.strip()) == 0:
+    if not command.normalized:
         return jsonify({
             'action': 'clarify',
             'speak': '',
@@ -10809,10 +12202,29 @@ def api_parse_command():
             'claude': True
         }), 200
     
+    # Fast path: trivial greetings and "open <site>" don't need the model
+    canned = GREETING_TABLE.get(command.normalized.rstrip('.!?')) or match_open_site(text)
+    if canned:
+        add_to_history(session_id, 'user', text)
+        add_to_history(session_id, 'jarvis', canned['speak'])
+        return jsonify({**canned, 'claude': True})
+    
     try:
         # Get conversation history as proper message objects
         history_messages = format_history_for_claude(session_id, limit=10)
         
+        # Identical command + context early in a conversation -> reuse the last parse
+        cache_key = None
+        if len(history_messages) <= RESPONSE_CACHE_MAX_HISTORY:
+            cache_key = (command.normalized, str(context['currentApp']), str(context['lastAction']),
+                         str(context['activity']), str(context['assistantName']))
+            cached = get_cached_response(cache_key)
+            if cached:
+                add_to_history(session_id, 'user', text)
+                if cached.get('response'):
+                    add_to_history(session_id, 'jarvis', cached.get('speak') or cached.get('response'))
+                return jsonify(cached)
+        
         # Build system prompt with context
         system_prompt = build_adaptive_prompt(context)
         
@@ -10820,7 +12232,7 @@ def api_parse_command():
         add_to_history(session_id, 'user', text)
         
         # Build the full messages array: history + current command
-        all_messages = history_messages + [
+        all_messages = FEW_SHOT + history_messages + [
                 {"role": "user", "content": f"Parse this voice command: \"{text}\""}
         ]
         
@@ -10829,95 +12241,23 @@ def api_parse_command():
             if all_messages[-2]['role'] == 'user':
                 all_messages.insert(-1, {"role": "assistant", "content": '{"response": "Listening..."}'})
         
-        # Use OpenAI GPT-4o for faster responses (preferred)
-        response_text = None
-        used_provider = None
-        
-        if OPENAI_AVAILABLE and openai_client:
-            try:
-                # OpenAI format: system message is part of messages array
-                openai_messages = [{"role": "system", "content": system_prompt}] + all_messages
-                
-                response = openai_client.chat.completions.create(
-                    model="gpt-4o",  # Fast + smart
-                    max_tokens=1024,
-                    messages=openai_messages,
-                    temperature=0.3  # Lower for more consistent command parsing
-                )
-                
-                response_text = response.choices[0].message.content.strip()
-                used_provider = 'gpt-4o'
-                print(f"GPT-4o RAW RESPONSE: {response_text}")
-                print(f"==========================================")
-            except Exception as e:
-                print(f"[ERROR] GPT-4o failed: {e}, falling back to Claude")
-                response_text = None  # Force Claude fallback
+        # Stream when the client asks for it, so "speak" can start before the JSON is complete
+        if data.get('stream') and OPENAI_AVAILABLE and openai_client:
+            return Response(stream_parse_command(system_prompt, all_messages, text, session_id, cache_key),
+                            mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
         
-        # Fallback to Claude if OpenAI not available or failed
-        if response_text is None and CLAUDE_AVAILABLE and claude_client:
-            try:
-                message = claude_client.messages.create(
-                    model="claude-sonnet-4-20250514",  # Sonnet 4 - fast + smart
-                    max_tokens=1024,
-                    messages=all_messages,
-                    system=system_prompt
-                )
-                response_text = message.content[0].text.strip()
-                used_provider = 'claude'
-                print(f"CLAUDE RAW RESPONSE: {response_text}")
-                print(f"==========================================")
-            except Exception as e:
-                print(f"[ERROR] Claude also failed: {e}")
-                return jsonify({
-                    'action': 'clarify',
-                    'speak': f'AI error: {str(e)[:50]}',
-                    'response': 'AI error',
-                    'needsClarification': True
-                }), 200
-        
-        if response_text is None:
-            return jsonify({
-                'action': 'clarify',
-                'speak': 'No AI configured. Add OPENAI_API_KEY or ANTHROPIC_API_KEY.',
-                'response': 'No AI',
-                'needsClarification': True
-            }), 200
-        
-        # Clean up response - remove markdown code blocks if Claude added them
-        if response_text.startswith('```'):
-            response_text = response_text.split('\n', 1)[-1]
-        if response_text.endswith('```'):
-            response_text = response_text[:-3].strip()
-        
-        # Try to parse as JSON
+        # GPT-4o first, Claude hedged in if it's slow or fails
         try:
-            parsed = json.loads(response_text)
-            parsed['claude'] = True
-            
-            # Store Jarvis response in history for context
-            if parsed.get('response'):
-                add_to_history(session_id, 'jarvis', parsed.get('speak') or parsed.get('response'))
-            
-            return jsonify(parsed)
-        except json.JSONDecodeError:
-            # Claude returned non-JSON - treat as conversational response
-            print(f"Claude returned non-JSON: {response_text[:100]}")
-            add_to_history(session_id, 'jarvis', response_text[:100])
-            return jsonify({
-                'action': 'type',  # Default: just type what user said
-                'content': text,
-                'speak': response_text[:150] if len(response_text) < 200 else None,
-                'response': 'Processed',
-                'claude': True
-            })
+            response_text, _ = ask_ai(system_prompt, all_messages)
+        except Exception as e:
+            logger.error("AI request failed: %s", e)
+            return jsonify(ai_error_result(e)), 200
+        
+        return jsonify(finish_parse(response_text, text, session_id, cache_key))
             
     except Exception as e:
-        import traceback
-        print(f"========== CLAUDE ERROR ==========")
-        print(f"ERROR TYPE: {type(e).__name__}")
-        print(f"ERROR MESSAGE: {str(e)}")
-        print(f"TRACEBACK: {traceback.format_exc()}")
-        print(f"===================================")
+        logger.exception("Parse command failed: %s: %s", type(e).__name__, e)
         return jsonify({
             'action': 'clarify',
             'speak': f'Error: {str(e)[:50]}',
@@ -10940,8 +12280,11 @@ def api_clear_history():
     
     session_id = data.get('sessionId', 'default')
     
+    if redis_client:
+        run_blocking(redis_client.delete, f'hist:{session_id}', f'hist-summary:{session_id}')
     if session_id in conversation_history:
-        conversation_history[session_id] = []
+        conversation_history[session_id].clear()
+    session_summaries.pop(session_id, None)
     
     return jsonify({'success': True, 'message': 'History cleared'})
 
@@ -10975,6 +12318,140 @@ def claude_status():
 # OPENAI WHISPER (CLOUD STT) & TTS ENDPOINTS
 # ============================================================================
 
+# Content-addressed cache of generated speech artifacts (set CORTONA_NO_WHISPER_CACHE=1 to bypass Whisper's)
+CACHE_DIR = os.environ.get('CORTONA_CACHE_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+WHISPER_CACHE_DIR = os.path.join(CACHE_DIR, 'whisper')
+WHISPER_CACHE_ENABLED = not os.environ.get('CORTONA_NO_WHISPER_CACHE')
+WHISPER_CACHE_MAX_BYTES = 20 * 1024 * 1024
+
+# Each cache directory is capped by total size; files are pruned least recently used first
+# (a cache hit refreshes the file's mtime) down to CACHE_PRUNE_TARGET of the cap
+CACHE_PRUNE_TARGET = 0.9
+cache_dir_bytes = {}  # cache directory -> bytes on disk, scanned on first write
+cache_dir_lock = threading.Lock()
+
+def prune_cache_dir(directory, max_bytes):
+    """Delete the least recently used files once a directory exceeds max_bytes; returns the bytes left"""
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and not entry.name.endswith('.tmp'):
+            st = entry.stat()
+            entries.append((st.st_mtime, st.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    if total > max_bytes:
+        entries.sort()
+        for _, size, path in entries:
+            if total <= max_bytes * CACHE_PRUNE_TARGET:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        logger.info("CACHE pruned %s to %d bytes", directory, total)
+    return total
+
+def write_cache_file(path, data, max_bytes=None):
+    """Atomically write bytes to a cache file (temp file + os.replace), keeping its directory under max_bytes"""
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        if max_bytes:
+            with cache_dir_lock:
+                total = cache_dir_bytes.get(directory)
+                if total is None or total + len(data) > max_bytes:
+                    total = prune_cache_dir(directory, max_bytes)  # rescan (counts the new file)
+                else:
+                    total += len(data)
+                cache_dir_bytes[directory] = total
+    except OSError as e:
+        logger.warning("CACHE could not write %s: %s", path, e)
+
+def touch_cache_file(path):
+    """Mark a cache file as recently used so pruning keeps it"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def run_blocking(fn, *args, **kwargs):
+    """Run a blocking SDK call on gevent's thread pool so the hub keeps serving other requests and sockets"""
+    if threading.current_thread() is not threading.main_thread():
+        return fn(*args, **kwargs)  # Already off the hub (e.g. on ai_executor) - just call it
+    return spawn_blocking(fn, *args, **kwargs).get()
+
+def spawn_blocking(fn, *args, **kwargs):
+    """Start a blocking call on gevent's thread pool; returns an AsyncResult to gevent.wait() on"""
+    def call():
+        # Hand errors back as values - the pool would otherwise print every provider failure as a crash
+        try:
+            return fn(*args, **kwargs), None
+        except Exception as e:
+            return None, e
+    
+    result = AsyncResult()
+    def settle(done):
+        value, error = done.get()
+        if error is None:
+            result.set(value)
+        else:
+            result.set_exception(error)
+    gevent.get_hub().threadpool.spawn(call).rawlink(settle)
+    return result
+
+class CacheStats:
+    """Hit/miss counters for an in-process cache"""
+    __slots__ = ('hits', 'misses')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self):
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': round(self.hit_rate, 3)}
+
+# Generated MP3s keyed by sha256(voice|speed|text): hot entries in memory, everything on disk
+TTS_CACHE_DIR = os.path.join(CACHE_DIR, 'tts')
+TTS_CACHE_MAX_BYTES = 200 * 1024 * 1024  # on disk, pruned like the Whisper cache
+MAX_TTS_CACHE = 256
+TTS_CHUNK_SIZE = 16384  # bytes per streamed write (the SDK default is much smaller)
+tts_cache = OrderedDict()  # key -> mp3 bytes
+tts_cache_stats = CacheStats()
+
+def get_cached_tts(key):
+    """Return cached MP3 bytes from memory or disk, or None"""
+    audio = tts_cache.get(key)
+    if audio is None:
+        path = os.path.join(TTS_CACHE_DIR, key + '.mp3')
+        try:
+            with open(path, 'rb') as f:
+                audio = f.read()
+        except OSError:
+            return None
+        touch_cache_file(path)
+        tts_cache[key] = audio
+    tts_cache.move_to_end(key)
+    if len(tts_cache) > MAX_TTS_CACHE:
+        tts_cache.popitem(last=False)
+    return audio
+
+def cache_tts(key, audio):
+    """Store MP3 bytes in the LRU and spill them to disk"""
+    tts_cache[key] = audio
+    tts_cache.move_to_end(key)
+    if len(tts_cache) > MAX_TTS_CACHE:
+        tts_cache.popitem(last=False)
+    write_cache_file(os.path.join(TTS_CACHE_DIR, key + '.mp3'), audio, max_bytes=TTS_CACHE_MAX_BYTES)
+
 @app.route('/api/whisper', methods=['POST'])
 @csrf.exempt
 @login_required
@@ -10992,40 +12469,46 @@ def api_whisper_transcribe():
     audio_file = request.files['audio']
     
     try:
-        import tempfile
-        import os as temp_os
+        buf = audio_file.read()
+        cache_path = os.path.join(WHISPER_CACHE_DIR, hashlib.sha256(buf).hexdigest() + '.json')
         
-        # Save to temp file (OpenAI API needs a file-like object with name)
-        with tempfile.NamedTemporaryFile(suffix='.webm', delete=False) as tmp:
-            audio_file.save(tmp.name)
-            tmp_path = tmp.name
+        # Same audio bytes -> same transcript, skip the API call entirely
+        if WHISPER_CACHE_ENABLED:
+            try:
+                with open(cache_path, 'rb') as f:
+                    cached = json_loads(f.read())
+                touch_cache_file(cache_path)
+                return jsonify({
+                    'success': True,
+                    'text': cached['text'],
+                    'source': 'openai-whisper',
+                    'cached': True
+                })
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
         
-        try:
-            # Call OpenAI Whisper API
-            with open(tmp_path, 'rb') as audio:
-                transcript = openai_client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio,
-                    response_format="text"
-                )
-            
-            print(f"[WHISPER-CLOUD] Transcribed: {transcript[:100]}...")
-            
-            return jsonify({
-                'success': True,
-                'text': transcript.strip(),
-                'source': 'openai-whisper'
-            })
-            
-        finally:
-            # Clean up temp file
-            if temp_os.path.exists(tmp_path):
-                temp_os.remove(tmp_path)
+        transcript = run_blocking(
+            openai_client.audio.transcriptions.create,
+            model="whisper-1",
+            file=("audio.webm", io.BytesIO(buf), audio_file.mimetype or "audio/webm"),
+            response_format="text"
+        )
+        text = transcript.strip()
+        
+        logger.info("WHISPER transcribed: %s", text[:100])
+        
+        if WHISPER_CACHE_ENABLED:
+            write_cache_file(cache_path, json.dumps({'text': text, 'model': 'whisper-1'}).encode(),
+                             max_bytes=WHISPER_CACHE_MAX_BYTES)
+        
+        return jsonify({
+            'success': True,
+            'text': text,
+            'source': 'openai-whisper'
+        })
                 
     except Exception as e:
-        import traceback
-        print(f"[WHISPER-CLOUD] Error: {e}")
-        print(traceback.format_exc())
+        logger.exception("WHISPER failed: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -11058,45 +12541,65 @@ def api_tts():
     if len(text) > 4096:
         text = text[:4096]
     
+    key = hashlib.sha256(f"{voice}|{speed}|{text}".encode()).hexdigest()
+    cached = get_cached_tts(key)
+    if cached is not None:
+        tts_cache_stats.hits += 1
+        return Response(cached, mimetype='audio/mpeg', headers={'Cache-Control': 'no-cache'})
+    tts_cache_stats.misses += 1
+    
     try:
         # Generate speech with OpenAI TTS
-        response = openai_client.audio.speech.create(
+        response = run_blocking(
+            openai_client.audio.speech.create,
             model="tts-1",  # Use tts-1-hd for higher quality
             voice=voice,    # alloy, echo, fable, onyx, nova, shimmer
             input=text,
             speed=speed     # 0.25 to 4.0
         )
         
-        # Stream the audio back
+        def generate():
+            # Stream the audio back, keeping references to the chunks so the complete MP3
+            # can be cached with a single exact-size join (no regrowing buffer, no final copy)
+            chunks = []
+            for chunk in response.iter_bytes(chunk_size=TTS_CHUNK_SIZE):
+                chunks.append(chunk)
+                yield chunk
+            cache_tts(key, b''.join(chunks))
+        
+        # No Content-Length, so the server sends it chunked; tell proxies not to buffer it
         return Response(
-            response.iter_bytes(),
+            stream_with_context(generate()),
             mimetype='audio/mpeg',
             headers={
                 'Content-Type': 'audio/mpeg',
-                'Cache-Control': 'no-cache'
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
             }
         )
         
     except Exception as e:
-        import traceback
-        print(f"[TTS] Error: {e}")
-        print(traceback.format_exc())
+        logger.exception("TTS failed: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+# Fixed for the life of the process, so serialized once and served with an ETag
+OPENAI_STATUS_JSON = json.dumps({
+    'available': OPENAI_AVAILABLE,
+    'features': {
+        'whisper': OPENAI_AVAILABLE,  # Cloud STT
+        'tts': OPENAI_AVAILABLE       # Text-to-Speech
+    },
+    'voices': ['alloy', 'echo', 'fable', 'onyx', 'nova', 'shimmer'] if OPENAI_AVAILABLE else []
+}).encode('utf-8')
+OPENAI_STATUS_ETAG = hashlib.sha256(OPENAI_STATUS_JSON).hexdigest()[:32]
+
 @app.route('/api/openai-status')
 def openai_status():
     """Check if OpenAI is available"""
-    return jsonify({
-        'available': OPENAI_AVAILABLE,
-        'features': {
-            'whisper': OPENAI_AVAILABLE,  # Cloud STT
-            'tts': OPENAI_AVAILABLE       # Text-to-Speech
-        },
-        'voices': ['alloy', 'echo', 'fable', 'onyx', 'nova', 'shimmer'] if OPENAI_AVAILABLE else []
-    })
+    return static_response(OPENAI_STATUS_JSON, 'application/json', OPENAI_STATUS_ETAG, max_age=60)
 
 @app.route('/api/test-gpt4o')
 def test_gpt4o():
@@ -11105,7 +12608,7 @@ def test_gpt4o():
         return jsonify({'error': 'OpenAI not available', 'OPENAI_AVAILABLE': OPENAI_AVAILABLE}), 503
     
     try:
-        response = openai_client.chat.completions.create(
+        response = chat_batcher.create(
             model="gpt-4o",
             max_tokens=50,
             messages=[
@@ -11128,7 +12631,6 @@ def test_gpt4o():
 @app.route('/api/debug-claude')
 def debug_claude():
     """Debug endpoint to check AI configuration"""
-    import os
     openai_key = os.environ.get('OPENAI_API_KEY', '')
     anthropic_key = os.environ.get('ANTHROPIC_API_KEY', '')
     
@@ -11137,7 +12639,7 @@ def debug_claude():
     # Test OpenAI (preferred)
     if OPENAI_AVAILABLE and openai_client:
         try:
-            test = openai_client.chat.completions.create(
+            test = chat_batcher.create(
                 model="gpt-4o",
                 max_tokens=10,
                 messages=[{"role": "user", "content": "Say hi"}]
@@ -11181,35 +12683,39 @@ def debug_claude():
         'openai_client_created': openai_client is not None,
         'claude_client_created': claude_client is not None,
         'test_results': results,
-        'test_error': test_error
+        'test_error': test_error,
+        'tts_cache': tts_cache_stats.as_dict()
     })
 
+@lru_cache(maxsize=8)
+def version_payload(server_url):
+    """Serialize the version response once per host; returns (bytes, etag)"""
+    # Checksum of exactly what /setup.py serves this host, so clients can verify the download
+    client_body = render_installer(DESKTOP_CLIENT_TEMPLATE, server_url)[0]
+    body = json.dumps({
+        'version': CLIENT_VERSION,
+        'download_url': server_url + '/setup.py',
+        'sha256': hashlib.sha256(client_body).hexdigest()
+    }).encode('utf-8')
+    return body, hashlib.sha256(body).hexdigest()[:32]
+
 @app.route('/api/version')
 def get_version():
     """Return the current client version"""
-    return jsonify({
-        'version': CLIENT_VERSION,
-        'download_url': request.host_url.rstrip('/') + '/setup.py'
-    })
+    body, etag = version_payload(request.host_url.rstrip('/'))
+    return static_response(body, 'application/json', etag, max_age=60)
 
 @app.route('/setup.py')
 def download_setup():
     """Download the auto-setup script"""
-    server_url = request.host_url.rstrip('/')
-    script = DESKTOP_CLIENT.replace('{{SERVER_URL}}', server_url).replace('{{VERSION}}', CLIENT_VERSION)
-    return Response(script, mimetype='text/plain', 
-                   headers={'Content-Disposition': 'attachment; filename=voice_hub_client.py'})
+    # Short max-age: clients re-fetch this to auto-update
+    return installer_response(DESKTOP_CLIENT_TEMPLATE, 'voice_hub_client.py', mimetype='text/plain',
+                              https=False, max_age=300)
 
-@app.route('/install.sh')
-@app.route('/install/mac')
-@app.route('/install/linux')
-def download_install_sh():
-    """One-liner install script for Mac/Linux - no login required"""
-    server_url = request.host_url.rstrip('/').replace('http://', 'https://')
-    script = '''#!/bin/bash
+INSTALL_SH = '''#!/bin/bash
 # Voice Hub Desktop Client - One-Click Installer
 
-SERVER_URL="''' + server_url + '''"
+SERVER_URL="{{SERVER_URL}}"
 
 echo "Voice Hub Desktop Client Installer"
 echo "========================================"
@@ -11247,16 +12753,17 @@ echo ""
 
 python3 voice_hub_client.py
 '''
-    return Response(script, mimetype='text/plain')
 
-@app.route('/install.ps1')
-@app.route('/install/windows')
-def download_install_ps1():
-    """One-liner install script for Windows - no login required"""
-    server_url = request.host_url.rstrip('/').replace('http://', 'https://')
-    script = '''# Voice Hub Desktop Client - Windows Installer
+@app.route('/install.sh')
+@app.route('/install/mac')
+@app.route('/install/linux')
+def download_install_sh():
+    """One-liner install script for Mac/Linux - no login required"""
+    return installer_response(INSTALL_SH, mimetype='text/plain')
+
+INSTALL_PS1 = '''# Voice Hub Desktop Client - Windows Installer
 
-$SERVER_URL = "''' + server_url + '''"
+$SERVER_URL = "{{SERVER_URL}}"
 
 Write-Host "Voice Hub Desktop Client Installer" -ForegroundColor Cyan
 Write-Host "========================================" -ForegroundColor Cyan
@@ -11293,14 +12800,23 @@ Write-Host ""
 
 python voice_hub_client.py
 '''
-    return Response(script, mimetype='text/plain')
+
+@app.route('/install.ps1')
+@app.route('/install/windows')
+def download_install_ps1():
+    """One-liner install script for Windows - no login required"""
+    return installer_response(INSTALL_PS1, mimetype='text/plain')
 
 @app.route('/api/devices', methods=['GET'])
 @csrf.exempt
 @login_required
 @api_limit
 def get_devices():
-    return jsonify(devices)
+    return Response(devices_json(), mimetype='application/json')
+
+# Device settings are display strings: strip ASCII control characters other than tab/newline/CR
+DEVICE_FIELD_TRANSLATE = str.maketrans('', '', ''.join(chr(c) for c in range(32) if c not in (9, 10, 13)))
+MAX_DEVICE_FIELD_LENGTH = 500
 
 @app.route('/api/devices/<device_id>', methods=['PUT', 'DELETE'])
 @csrf.exempt
@@ -11313,18 +12829,17 @@ def manage_device(device_id):
     if request.method == 'DELETE':
         if device_id in devices:
             del devices[device_id]
+            touch_devices()
         return jsonify({'status': 'ok'})
     elif request.method == 'PUT':
         data = request.json
         if device_id in devices:
-            # Sanitize incoming data
-            sanitized_data = {}
-            for key, value in data.items():
-                if isinstance(value, str):
-                    sanitized_data[key] = sanitize_input(value, max_length=500)
-                else:
-                    sanitized_data[key] = value
-            devices[device_id].update(sanitized_data)
+            # Sanitize incoming data in one pass per string: drop control characters, cap the length
+            devices[device_id].update({
+                key: value.translate(DEVICE_FIELD_TRANSLATE)[:MAX_DEVICE_FIELD_LENGTH] if isinstance(value, str) else value
+                for key, value in data.items()
+            })
+            touch_devices()
         return jsonify(devices.get(device_id, {}))
 
 # ============================================================================
@@ -11364,6 +12879,24 @@ def require_socket_auth(f):
     
     return decorated
 
+# lastSeen only needs ~second resolution, so the ISO string is reformatted at most twice a second
+NOW_ISO_RESOLUTION = 0.5  # seconds
+now_iso_cache = (0.0, '')  # (time.time() when formatted, ISO string)
+
+def now_iso():
+    """datetime.now().isoformat(), reused for up to NOW_ISO_RESOLUTION seconds"""
+    global now_iso_cache
+    now = time.time()
+    if now - now_iso_cache[0] >= NOW_ISO_RESOLUTION:
+        now_iso_cache = (now, datetime.fromtimestamp(now).isoformat())
+    return now_iso_cache[1]
+
+def bind_device_sid(device_id, sid):
+    """Record which socket a device is on, keeping the sid -> device index in step"""
+    devices[device_id]['sid'] = sid
+    sid_to_device.setdefault(sid, set()).add(device_id)
+    touch_devices()
+
 @socketio.on('connect')
 def on_connect():
     """Handle new WebSocket connections"""
@@ -11382,10 +12915,8 @@ def on_desktop_register(data):
     device_id = data.get('deviceId')
     device_info = data.get('device', {})
     
-    print(f"\n [DESKTOP CLIENT REGISTER]")
-    print(f"   Name: {device_info.get('name', device_id)}")
-    print(f"   ID: {device_id}")
-    print(f"   Platform: {device_info.get('platform', 'unknown')}")
+    logger.info("DESKTOP REGISTER %s (%s) platform=%s",
+                device_info.get('name', device_id), device_id, device_info.get('platform', 'unknown'))
     
     # Join rooms
     join_room('dashboard')
@@ -11403,17 +12934,16 @@ def on_desktop_register(data):
             'icon': device_info.get('icon', 'desktop'),
             'type': 'desktop_client',
             'platform': device_info.get('platform', 'unknown'),
-            'sid': request.sid,
             'online': True,
-            'lastSeen': datetime.now().isoformat()
+            'lastSeen': now_iso()
         })
+        bind_device_sid(device_id, request.sid)
         
         # Mark as authenticated
         authenticated_sockets[request.sid] = {'type': 'desktop_client', 'device_id': device_id}
         
         # Notify others
         socketio.emit('device_online', {'deviceId': device_id, 'device': devices[device_id]}, room='dashboard')
-        print(f"    Desktop client registered and joined room: {device_id}")
     
     # Send confirmation
     emit('registration_confirmed', {'deviceId': device_id, 'status': 'ok'})
@@ -11424,10 +12954,8 @@ def on_desktop_register(data):
 def on_dashboard_join(data):
     device_id = data.get('deviceId')
     device_info = data.get('device', {})
-    print(f"\n[DEVICE JOIN] {device_info.get('name', device_id)}")
-    print(f"   ID: {device_id}")
-    print(f"   Wake Word: {device_info.get('wakeWord', 'unknown')}")
-    print(f"   Type: {device_info.get('type', 'browser')}")
+    logger.info("DEVICE JOIN %s (%s) wake=%s type=%s", device_info.get('name', device_id), device_id,
+                device_info.get('wakeWord', 'unknown'), device_info.get('type', 'browser'))
     
     join_room('dashboard')
     join_room(device_id)  # Join own room to receive routed commands
@@ -11444,10 +12972,10 @@ def on_dashboard_join(data):
             'wakeWord': device_info.get('wakeWord', 'computer'),
             'icon': device_info.get('icon', ''),
             'type': device_info.get('type', 'browser'),
-            'sid': request.sid,
             'online': True,
-            'lastSeen': datetime.now().isoformat()
+            'lastSeen': now_iso()
         })
+        bind_device_sid(device_id, request.sid)
         
         # Notify others this device is online
         socketio.emit('device_online', {'deviceId': device_id, 'device': devices[device_id]}, room='dashboard')
@@ -11455,6 +12983,32 @@ def on_dashboard_join(data):
     # Send full device list to the joining client
     emit('devices_update', {'devices': devices})
 
+# Device changes go to dashboards as device_patch deltas ({op, deviceId, device}) instead of
+# the whole devices dict; the full devices_update is only sent to a socket when it joins.
+# Patches are debounced: every device touched within the window is sent once, in one emit.
+DEVICE_PATCH_DEBOUNCE = 0.2  # seconds
+pending_device_patches = set()
+
+def flush_device_patches():
+    """Background task: wait out the debounce window, then emit the current state of every touched device"""
+    global pending_device_patches
+    socketio.sleep(DEVICE_PATCH_DEBOUNCE)
+    touched, pending_device_patches = pending_device_patches, set()
+    patches = []
+    for device_id in touched:
+        device = devices.get(device_id)
+        if device is None:
+            patches.append({'op': 'delete', 'deviceId': device_id})
+        else:
+            patches.append({'op': 'upsert', 'deviceId': device_id, 'device': device})
+    socketio.emit('device_patch', patches, room='dashboard')
+
+def schedule_device_patch(device_id):
+    """Queue an added/changed/removed device for the next device_patch emit, arming the flush if needed"""
+    if not pending_device_patches:
+        socketio.start_background_task(flush_device_patches)
+    pending_device_patches.add(device_id)
+
 @socketio.on('device_status')
 def on_device_status(data):
     device_id = data.get('deviceId')
@@ -11470,20 +13024,24 @@ def on_device_update(data):
     if device_id:
         if device_id in devices:
             devices[device_id].update(settings)
-        else:
+        elif settings.get('id') == device_id and settings.get('name'):
             # Add new device (like desktop clients)
             devices[device_id] = settings
             print(f" New device registered: {settings.get('name', device_id)}")
+        else:
+            # Partial update for a device we don't know (e.g. after a restart) -
+            # don't create a half record, ask the sender for the full state
+            emit('device_resync', {'deviceId': device_id})
+            return
         
         # Mark as online and track socket session
         devices[device_id]['online'] = True
-        devices[device_id]['sid'] = request.sid
-        devices[device_id]['lastSeen'] = datetime.now().isoformat()
+        devices[device_id]['lastSeen'] = now_iso()
+        bind_device_sid(device_id, request.sid)
         
         # Notify all dashboards
         socketio.emit('device_online', {'deviceId': device_id}, room='dashboard')
-    
-    socketio.emit('devices_update', {'devices': devices}, room='dashboard')
+        schedule_device_patch(device_id)
 
 @socketio.on('device_delete')
 def on_device_delete(data):
@@ -11491,15 +13049,17 @@ def on_device_delete(data):
     if device_id and device_id in devices:
         name = devices[device_id].get('name', device_id)
         del devices[device_id]
+        touch_devices()
         print(f" Device deleted: {name}")
-        socketio.emit('devices_update', {'devices': devices}, room='dashboard')
+        schedule_device_patch(device_id)
 
 @socketio.on('device_add')
 def on_device_add(data):
     device_id = data.get('id')
     if device_id:
         devices[device_id] = data
-    socketio.emit('devices_update', {'devices': devices}, room='dashboard')
+        touch_devices()
+        schedule_device_patch(device_id)
 
 @socketio.on('transcript')
 def on_transcript(data):
@@ -11509,6 +13069,7 @@ def on_transcript(data):
     
     if device_id and device_id in devices:
         devices[device_id]['wordsTyped'] = devices[device_id].get('wordsTyped', 0) + words
+        touch_devices()
     
     socketio.emit('transcript_received', data, room='dashboard')
 
@@ -11521,47 +13082,83 @@ def on_route_command(data):
     action = data.get('action', 'type')
     target_app = data.get('targetApp')
     
-    print(f"\n{'='*60}")
-    print(f"📤 ROUTE_COMMAND received!")
-    print(f"   From: {from_device_id}")
-    print(f"   To: {to_device_id}")
-    print(f"   Command: {command[:50] if command else 'NONE'}...")
-    print(f"   Target app: {target_app or 'None'}")
-    print(f"   Known devices: {list(devices.keys())}")
-    print(f"{'='*60}")
-    
-    # Send the command to the target device
-    print(f"   Emitting command_received to room: '{to_device_id}'")
+    logger.info("ROUTE %s -> %s cmd=%r app=%s", from_device_id, to_device_id,
+                command[:50] if command else None, target_app)
     
     # Check if target device exists and has a socket session
     target_device = devices.get(to_device_id, {})
-    print(f"   Target device info: {target_device.get('name', 'unknown')}, sid: {target_device.get('sid', 'NONE')}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("ROUTE target=%s sid=%s known=%s", target_device.get('name', 'unknown'),
+                     target_device.get('sid'), list(devices.keys()))
     
+    # Point-to-point: send straight to the device's socket while it's online; fall back to
+    # the device's room if we don't have a live sid (e.g. it reconnected without re-registering)
+    target_sid = target_device.get('sid') if target_device.get('online') else None
     socketio.emit('command_received', {
         'fromDeviceId': from_device_id,
         'command': command,
         'action': action,
         'targetApp': target_app,
         'timestamp': data.get('timestamp')
-    }, room=to_device_id)
-    
-    print(f"    command_received emitted!")
+    }, to=target_sid or to_device_id)
     
     # Also notify the dashboard
     socketio.emit('command_routed', data, room='dashboard')
 
+# Heartbeats only refresh lastSeen, so they are never broadcast one by one: the devices that
+# ticked since the last flush go to dashboards as one 'seen' op per interval, carrying compact
+# [deviceId, epochSeconds] pairs, in a device_patch
+# Key: device_id, Value: (deviceId, epochSeconds), in recency order
+pending_heartbeats = {}
+HEARTBEAT_FLUSH_INTERVAL = 5.0  # seconds; lastSeen only needs to be roughly current on dashboards
+heartbeat_flusher_started = False
+
+# Back-pressure: heartbeats are idempotent, so under a burst we keep at most this many
+# queued and drop the oldest. device_online/device_offline are never dropped.
+MAX_PENDING_HEARTBEATS = 256
+heartbeat_dropped_total = 0
+
+def flush_heartbeats_loop():
+    """Background task: send the devices that heartbeated since the last flush as a 'seen' op of [deviceId, epochSeconds] pairs"""
+    global pending_heartbeats
+    while True:
+        socketio.sleep(HEARTBEAT_FLUSH_INTERVAL)
+        if pending_heartbeats:
+            ticked, pending_heartbeats = pending_heartbeats, {}
+            # Devices already queued for a full upsert carry their lastSeen in that patch
+            seen = [pair for device_id, pair in ticked.items()
+                    if device_id in devices and device_id not in pending_device_patches]
+            if seen:
+                socketio.emit('device_patch', [{'op': 'seen', 'seen': seen}], room='dashboard')
+
+def queue_heartbeat(device_id, last_seen):
+    """Queue a lastSeen update (epoch seconds) for the next flush, dropping the oldest entry when full"""
+    global heartbeat_dropped_total
+    # Re-insert so dict order tracks recency. Pairs instead of objects keep the
+    # frame free of repeated key names.
+    pending_heartbeats.pop(device_id, None)
+    pending_heartbeats[device_id] = (device_id, last_seen)
+    if len(pending_heartbeats) > MAX_PENDING_HEARTBEATS:
+        del pending_heartbeats[next(iter(pending_heartbeats))]
+        heartbeat_dropped_total += 1
+
+def start_heartbeat_flusher():
+    """Start the heartbeat flush task on first use"""
+    global heartbeat_flusher_started
+    if not heartbeat_flusher_started:
+        heartbeat_flusher_started = True
+        socketio.start_background_task(flush_heartbeats_loop)
+
 @socketio.on('heartbeat')
 def on_heartbeat(data):
     """Update lastSeen timestamp for a device"""
     device_id = data.get('deviceId')
     if device_id and device_id in devices:
-        devices[device_id]['lastSeen'] = datetime.now().isoformat()
+        devices[device_id]['lastSeen'] = now_iso()
         devices[device_id]['online'] = True
-        # Broadcast updated lastSeen to all dashboards
-        socketio.emit('device_heartbeat', {
-            'deviceId': device_id,
-            'lastSeen': devices[device_id]['lastSeen']
-        }, room='dashboard')
+        touch_devices()
+        queue_heartbeat(device_id, int(time.time()))
+        start_heartbeat_flusher()
 
 @socketio.on('watch_ai_request')
 def on_watch_ai_request(data):
@@ -11599,27 +13196,35 @@ def on_disconnect():
         auth_info = authenticated_sockets.pop(sid)
         print(f" Socket disconnected: {auth_info.get('user') or auth_info.get('device', 'unknown')}")
     
-    # Notify other devices this one went offline
-    for device_id, device in devices.items():
-        if device.get('sid') == sid:
+    # Notify other devices this one went offline (skipping any that already moved to a new socket)
+    for device_id in sid_to_device.pop(sid, ()):
+        device = devices.get(device_id)
+        if device is not None and device.get('sid') == sid:
             device['online'] = False
+            touch_devices()
             socketio.emit('device_offline', {'deviceId': device_id}, room='dashboard')
 
 # ============================================================================
 # START SERVER
 # ============================================================================
 
+# update_available is one emit to the dashboard room (it would fan out across workers if a
+# message queue is ever added). Staggering happens client-side: each client waits a random
+# part of 'spread' seconds before fetching /setup.py, so they don't all download in the same instant
+UPDATE_NOTIFY_SPREAD = 15  # seconds
+
 def notify_clients_of_update():
     """Notify all connected desktop clients of the new version after server restart"""
-    import time
     time.sleep(10)  # Wait for clients to reconnect after server restart
-    print(f"Broadcasting update notification (v{CLIENT_VERSION}) to all clients...")
     # Use the Render URL or localhost for download
     base_url = os.environ.get('RENDER_EXTERNAL_URL', 'http://localhost:5000')
-    socketio.emit('update_available', {
+    payload = {
         'version': CLIENT_VERSION,
-        'download_url': f"{base_url}/setup.py"
-    }, room='dashboard')
+        'download_url': f"{base_url}/setup.py",
+        'spread': UPDATE_NOTIFY_SPREAD
+    }
+    print(f"Broadcasting update notification (v{CLIENT_VERSION})...")
+    socketio.emit('update_available', payload, room='dashboard')
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
@@ -11640,7 +13245,6 @@ if __name__ == '__main__':
     """)
     
     # Start background thread to notify clients after startup
-    import threading
     update_thread = threading.Thread(target=notify_clients_of_update, daemon=True)
     update_thread.start()
     